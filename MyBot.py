@@ -19,6 +19,13 @@ from myutils.utils import *
 from myutils.constants import *
 
 from myutils.mytasks import make_dropoff_task
+from myutils.reservations import order_by_reservations
+from myutils.peak_areas import get_peak_areas
+from myutils.deadline import TurnDeadline
+from myutils.assignment import get_target_values, assign_targets
+from myutils.hotspots import get_top_cells
+
+from hlt.ship_registry import make_ship_table, STATUS_CODES, EVENT_SPAWNED, EVENT_DESTROYED, EVENT_MOVED, EVENT_MINED, EVENT_DEPOSITED
 
 #
 # main
@@ -108,6 +115,16 @@ if DEBUG & (DEBUG_GAME): logging.info("Game - Successfully created bot! My Playe
 
 """ <<<Game Loop>>> """
 
+# engine turn time limit, expensive phases degrade as it runs out
+deadline = TurnDeadline(TURN_TIME_BUDGET, DEADLINE_RESERVES)
+
+# the cv stack of the last turn it was generated
+prior_cv_stack = None
+
+# the dropoff area is kept when there's no time to find it
+current_dropoff_position = None
+prior_dropoff_area_turn = None
+
 while True:
     game.collisions.clear()
     game.command_queue.clear()
@@ -122,7 +139,8 @@ while True:
     game_map = game.game_map
     game_metrics = game.game_metrics
 
-    game.update_frame()
+    # the deadline starts when the turn number arrives, frame parsing counts against the budget
+    game.update_frame(deadline.start)
 
     my_ships = me.get_ships()
 
@@ -147,25 +165,26 @@ while True:
         # build target sets
         #
 
-        aggregate_cv_map = None
+        # cells with an open loiter assignment, built once per turn
+        assigned_mask = None
 
         cv_map_start_time = time.time()
 
-        for target_key in get_base_positions(game):
-            target_sets[target_key] = []
+        deadline.start_phase("cv_map")
 
-            # prime cache, first call to a cv_map position triggers cache load
-            cv_map = game_map.get_cell_value_map(target_key, mining_rate_mult * game.get_mining_rate())
+        base_positions = get_base_positions(game)
 
-            if cv_map is None:
-                raise RuntimeError("cv map is None")
+        # the cv maps of all bases in one pass, each cell belongs to the base that values it most
+        if prior_cv_stack is not None and prior_cv_stack.positions == tuple(base_positions) and deadline.degrade("cv_map"):
+            cv_stack = prior_cv_stack
+        else:
+            cv_stack = game_map.get_cell_value_stack(base_positions, mining_rate_mult * game.get_mining_rate(), me.id if CV_MAP_USE_INSPIRATION else None)
+            prior_cv_stack = cv_stack
 
-            if aggregate_cv_map is None:
-                #aggregate_cv_map = np.full((game.game_map.width, game.game_map.height), dtype="float32", fill_value=-np.inf)
-                aggregate_cv_map = np.array(cv_map, copy=True)
-            else:
-                aggregate_cv_map = np.maximum(aggregate_cv_map, cv_map)
-                cv_map = np.ma.MaskedArray(cv_map, mask = [cv_map < aggregate_cv_map], fill_value = -np.inf, copy=True, dtype="float32")
+        for base_idx, target_key in enumerate(base_positions):
+            target_sets[target_key] = []
+
+            cv_map = cv_stack.get_owned_map(base_idx)
 
             if DEBUG & (DEBUG_CV_MAP):
                 if game.turn_number in [1, 2, 5, 10, 25, 50] + list(range(0, constants.MAX_TURNS + 100, 100)):
@@ -180,58 +199,39 @@ while True:
             if DEBUG & (DEBUG_TIMING): logging.info("Time - Cell Value Map generation elapsed time: {}".format(round(time.time() - cv_map_start_time, 2)))
 
             target_list_start_time = time.time()
+            deadline.start_phase("target_set")
 
             #
-            # Find hottest positions
+            # Find hottest positions, the best cells not already assigned in one pass
             #
 
-            hottest_areas = {}
-
-#        for target_key in target_sets.keys():
-
             if DEBUG & (DEBUG_GAME): logging.info("Game - Loading target key {}".format(target_key))
 
-            cv_map_threshold = CV_MAP_THRESHOLD_DEFAULT
-
-            #cv_map = game_map.get_cell_value_map(target_key, mining_rate_mult * game.get_mining_rate())
-
-            while len(target_sets[target_key]) < len(my_ships):
-                if DEBUG & (DEBUG_GAME): logging.info("Game - Loading hottest positions for target key {}".format(target_key))
-
-                hottest_areas[target_key] = np.ma.MaskedArray(cv_map, mask = [cv_map <= cv_map_threshold], fill_value = 0, copy=False)
-
-                if DEBUG & (DEBUG_GAME):
-                    if cv_map_threshold == CV_MAP_THRESHOLD_DEFAULT:
-                        logging.info("Game - Generating targets, cv_map_threshold: {}".format(cv_map_threshold))
-                    else:
-                        logging.info("Game - Ships({}) exceeds the {} available targets. Generating targets using cv_map_threshold {}".format(len(my_ships), len(target_sets[target_key]), cv_map_threshold))
-
-                if DEBUG & (DEBUG_CV_MAP):
-                    if game.turn_number in [1, 2, 5, 10, 25, 50] + list(range(0, constants.MAX_TURNS + 100, 100)):
-                        logging.info("hottest_areas({}):\n{}".format(target_key, hottest_areas[target_key].astype(np.int)))
-
-                y_vals, x_vals = hottest_areas[target_key].nonzero()
-
-                hotspots = []
-                for x, y in zip(x_vals, y_vals):
-                    p = Position(x, y)
-                    hotspots.append((p, round(cv_map[y][x]), game_map[p].halite_amount)) # (position, value, halite)
-
-                # remove the hotspots previosly assigned, but not reached
-                hotspots[:] = [x for x in hotspots if x[0] not in game.loiter_assignments]
+            if assigned_mask is None:
+                assigned_mask = np.zeros((game_map.height, game_map.width), dtype=bool)
+                for p in game.loiter_assignments:
+                    assigned_mask[p.y, p.x] = True
 
-                target_sets[target_key] = sorted(hotspots, key=lambda item: item[1])
+            y_vals, x_vals, target_values = get_top_cells(cv_map, len(my_ships), assigned_mask, CV_MAP_THRESHOLD_MIN)
 
-                target_count = len(target_sets[target_key])
+            # (position, value, halite), sorted by value
+            hotspots = []
+            for x, y, value in zip(x_vals.tolist(), y_vals.tolist(), target_values.tolist()):
+                p = game_map.get_position(x, y)
+                hotspots.append((p, round(value), game_map[p].halite_amount))
 
-                if DEBUG & (DEBUG_TASKS): logging.info("Task - Found {} targets for target set {}".format(target_count, target_key))
+            target_sets[target_key] = hotspots[::-1]
 
-                if target_count < len(my_ships):
-                    cv_map_threshold -= CV_MAP_THRESHOLD_STEP
+            # the threshold the targets reach down to, the highest CV_MAP_THRESHOLD_STEP below
+            # the value of the last target. Used for the dropoff areas
+            if len(hotspots) < len(my_ships):
+                cv_map_threshold = CV_MAP_THRESHOLD_MIN - CV_MAP_THRESHOLD_STEP
+            elif hotspots and target_values[-1] <= CV_MAP_THRESHOLD_DEFAULT:
+                cv_map_threshold = CV_MAP_THRESHOLD_DEFAULT - CV_MAP_THRESHOLD_STEP * (math.floor((CV_MAP_THRESHOLD_DEFAULT - target_values[-1]) / CV_MAP_THRESHOLD_STEP) + 1)
+            else:
+                cv_map_threshold = CV_MAP_THRESHOLD_DEFAULT
 
-                if cv_map_threshold < CV_MAP_THRESHOLD_MIN:
-                    if DEBUG & (DEBUG_TASKS): logging.info("Task - Target cv_map_threshold {} reached min cv_map_threshold {}. Aborting target generation for target set {}".format(cv_map_threshold, CV_MAP_THRESHOLD_MIN, target_key))
-                    break
+            if DEBUG & (DEBUG_TASKS): logging.info("Task - Found {} targets for target set {}, cv_map_threshold: {}".format(len(hotspots), target_key, cv_map_threshold))
 
             if DEBUG & (DEBUG_TASKS): logging.info("Task - There are {} ships and {} targets available for target set {}.".format(len(my_ships), len(target_sets[target_key]), target_key))
             if DEBUG & (DEBUG_TASKS): logging.info("Task - Targets({}): {}".format(target_key, list_to_short_string(target_sets[target_key], 2)))
@@ -242,162 +242,98 @@ while True:
             #
 
             dropoff_area_start_time = time.time()
+            deadline.start_phase("dropoff_area")
 
             if DEBUG & (DEBUG_GAME): logging.info("Game - Finding hottest areas for target key {}".format(target_key))
 
-            # TODO is deep copy necessary for any reason?
-            #area_map = game_map.get_halite_map()
-            area_map = cv_map
-
-            # TODO Tune the mask threshold
-            # Notes:
-            #  - Using % of max fails since a single large cell obscures the rest of the map
-            #
+            if prior_dropoff_area_turn is not None and deadline.degrade("dropoff_area"):
+                if DEBUG & (DEBUG_CV_MAP): logging.info("Game - Out of time, keeping dropoff {} from turn {}".format(current_dropoff_position, prior_dropoff_area_turn))
+            else:
+                # TODO is deep copy necessary for any reason?
+                #area_map = game_map.get_halite_map()
+                area_map = cv_stack.values[base_idx]
 
-            #area_map_threshold = round(max(np.mean(area_map), np.median(area_map)))
-            #area_map_threshold = SHIP_MINING_THRESHOLD_DEFAULT
-            #area_map_threshold = round(np.percentile(area_map, 80))
-            area_map_threshold = cv_map_threshold
-
-            def fthreshold(p1, p2):
-                """
-                Test p1
-
-                :param p1 Current position
-                :param p2 Previous position
-                :return Return True if p1 test passed
-                """
-                np1 = game_map.normalize(p1)
-                np2 = game_map.normalize(p2)
-                h1 = area_map[np1.y][np1.x]
-                h2 = area_map[np2.y][np2.x]
-
-                # TODO Do we need to tune this?
-                # - What should decent threshold be?
-                # - Should we exclude valves below mining threshold?
-                #
-                # Note:
-                #   - You must specify only traversal up or down, otherwise you'll endless loop if
-                #   the map is fullish, i.e. the is a contiguous region from one side to the other
-                #   - If peak points are not sorted it doesn't matter which traversal direction is used
+                # TODO Tune the mask threshold
+                # Notes:
+                #  - Using % of max fails since a single large cell obscures the rest of the map
                 #
-                #retval = h1 > h2/5 and h1 >= h2 and h1 > SHIP_MINING_THRESHOLD_DEFAULT
-                #retval = h1 > SHIP_MINING_THRESHOLD_DEFAULT # too loose
-                #retval = h1 <= h2 and h1 > SHIP_MINING_THRESHOLD_DEFAULT
-
-                retval =  h1 < h2 and h1 > area_map_threshold
-
-                return retval
-
-            # 1. Get list of halite peaks
-            # 2. For each peak, determine it's contiguous area based on threshold
-            # 3. Sort peak areas by total value
-            # 4. For best peak areas, get it's weighted center, this is the deployment point
-
-            area_peak_map = np.ma.MaskedArray(area_map, mask = [area_map <= area_map_threshold], fill_value = 0, copy=False)
-
-            if DEBUG & (DEBUG_CV_MAP):
-                logging.info("area_peak_map:\n{}".format(area_peak_map.astype(np.int)))
-
-            r_vals, c_vals = area_peak_map.nonzero()
-
-            peaks = []
-            peak_positions = {}
-            known_points = set()
-
-            peaks_by_value = []
-            for r, c in zip(r_vals, c_vals):
-                peaks_by_value.append((area_peak_map[r][c], Position(c, r)))
-
-            peaks_by_value.sort(key=itemgetter(0), reverse=True)
-
-            # for each peak exposed by the mask, get it's contiguous positions
-            for halite, pos in peaks_by_value:
-                if pos in known_points:
-                    continue
-
-                peak_positions[pos] = game_map.get_contiguous_area(pos, fthreshold)
-
-                known_points |= peak_positions[pos]
-
-                total_halite = 0
-                for p in peak_positions[pos]:
-                    npos = game_map.normalize(p)
-                    # area_map is a raw map (e.g. _cell_value_map or _halite_map) and is access rc (not xy)
-                    total_halite += area_map[npos.y][npos.x]
 
-                peaks.append((pos, total_halite, len(peak_positions[pos]))) # (position, total_halite, position_count)
+                #area_map_threshold = round(max(np.mean(area_map), np.median(area_map)))
+                #area_map_threshold = SHIP_MINING_THRESHOLD_DEFAULT
+                #area_map_threshold = round(np.percentile(area_map, 80))
+                area_map_threshold = cv_map_threshold
 
-                #if DEBUG & (DEBUG_CV_MAP): logging.info("Peak area {} has {} positions with a total value of {}".format(pos, len(peak_positions[pos]), round(total_halite)))
+                # 1. Label every peak area above the threshold, an area is everything that falls
+                #    away from its peak
+                # 2. Peak areas are sorted by total value
+                # 3. For best peak areas, get it's weighted center, this is the deployment point
 
-            #
-            # grab the peak with the best value
-            #
+                peak_areas = get_peak_areas(area_map, area_map_threshold)
 
-            peaks.sort(key=lambda i: i[1], reverse=True)
+                if DEBUG & (DEBUG_CV_MAP):
+                    logging.info("area peak labels:\n{}".format(peak_areas.labels))
 
-            best_peak = None
+                #
+                # grab the peak with the best value
+                #
 
-            # TODO tune param
-            for peak in peaks:
-                closest_base_position = get_base_positions(game, peak[0])
-                distance = game_map.calculate_distance(closest_base_position, peak[0])
-                if peak[2] >= DROPOFF_AREA_MIN_POSITIONS:
-                    if distance < game_map.width/4:
-                        if DEBUG & (DEBUG_CV_MAP): logging.info("Game - Best peak candidate {} is being rejected, distance to closes base is {}".format(peak[0], distance))
+                best_peak = None
+
+                # TODO tune param
+                for idx, peak_position in enumerate(peak_areas.peaks):
+                    closest_base_position = get_base_positions(game, peak_position)
+                    distance = game_map.calculate_distance(closest_base_position, peak_position)
+                    if peak_areas.counts[idx] >= DROPOFF_AREA_MIN_POSITIONS:
+                        if distance < game_map.width/4:
+                            if DEBUG & (DEBUG_CV_MAP): logging.info("Game - Best peak candidate {} is being rejected, distance to closes base is {}".format(peak_position, distance))
+                            break
+                        best_peak = idx
                         break
-                    best_peak = peak
-                    break
 
-            if best_peak is None:
-                current_dropoff_position = None
-                area_mask = None
-                if DEBUG & (DEBUG_CV_MAP): logging.info("Game - Best peak is None")
-            else:
-                best_peak_pos = best_peak[0]
-                best_peak_total_halite = best_peak[1]
-                best_peak_positions_count = best_peak[2]
+                if best_peak is None:
+                    current_dropoff_position = None
+                    area_mask = None
+                    if DEBUG & (DEBUG_CV_MAP): logging.info("Game - Best peak is None")
+                else:
+                    best_peak_pos = peak_areas.peaks[best_peak]
+                    best_peak_total_halite = peak_areas.totals[best_peak]
+                    best_peak_positions_count = peak_areas.counts[best_peak]
 
-                # lazy, should be single loop?
-                min_row = min(peak_positions[best_peak_pos], key=attrgetter("y")).y
-                max_row = max(peak_positions[best_peak_pos], key=attrgetter("y")).y
-                min_col = min(peak_positions[best_peak_pos], key=attrgetter("x")).x
-                max_col = max(peak_positions[best_peak_pos], key=attrgetter("x")).x
+                    # area mask coords are unnormalized, areas that wrap the map edges are contiguous
+                    min_row, min_col, area_mask = peak_areas.get_area_mask(best_peak, area_map)
 
-                area_mask = np.empty((max_row - min_row + 1, max_col - min_col + 1), dtype="float32")
+                    weighted_center = ndimage.measurements.center_of_mass(area_mask)
 
-                for pos in peak_positions[best_peak_pos]:
-                    npos = game_map.normalize(pos)
-                    area_mask[pos.y - min_row][pos.x - min_col] = area_map[npos.y][npos.x]
+                    # weighted center is in rc (not xy)
+                    if (np.isnan(weighted_center[1])):
+                        c_x = round((area_mask.shape[1] - 1)/2)
+                        logging.warn("ndimage.measurements.center_of_mass returned NaN for c_x")
+                    else:
+                        c_x = round(weighted_center[1])
 
-                weighted_center = ndimage.measurements.center_of_mass(area_mask)
+                    if (np.isnan(weighted_center[0])):
+                        c_y = round((area_mask.shape[0] - 1)/2)
+                        logging.warn("ndimage.measurements.center_of_mass returned NaN for c_y")
+                    else:
+                        c_y = round(weighted_center[0])
 
-                # weighted center is in rc (not xy)
-                if (np.isnan(weighted_center[1])):
-                    c_x = round((pos.x - min_col)/2)
-                    logging.warn("ndimage.measurements.center_of_mass returned NaN for c_x")
-                else:
-                    c_x = round(weighted_center[1])
+                    current_dropoff_position = game_map.normalize(Position(min_col + c_x, min_row + c_y))
 
-                if (np.isnan(weighted_center[0])):
-                    c_y = round((pos.y - min_row)/2)
-                    logging.warn("ndimage.measurements.center_of_mass returned NaN for c_y")
-                else:
-                    c_y = round(weighted_center[0])
+                    if DEBUG & (DEBUG_CV_MAP): logging.info("Best peak is {} with {} positions and a total value of {}. Center is xy({}, {})".format(best_peak_pos, best_peak_positions_count, round(best_peak_total_halite), c_x, c_y))
 
-                current_dropoff_position = game_map.normalize(Position(min_col + c_x, min_row + c_y))
+                    ### end best peak discovery
 
-                if DEBUG & (DEBUG_CV_MAP): logging.info("Best peak is {} with {} positions and a total value of {}. Center is xy({}, {})".format(best_peak_pos, best_peak_positions_count, round(best_peak_total_halite), c_x, c_y))
+                if DEBUG & (DEBUG_CV_MAP): logging.info("best area mask:\n{}".format(area_mask))
 
-                ### end best peak discovery
-
-            if DEBUG & (DEBUG_CV_MAP): logging.info("best area mask:\n{}".format(area_mask))
+                prior_dropoff_area_turn = game.turn_number
             if DEBUG & (DEBUG_CV_MAP): logging.info("Game - Current dropoff is {}".format(current_dropoff_position))
             if DEBUG & (DEBUG_TIMING): logging.info("Time - Dropoff area generation elapsed time: {}".format(round(time.time() - dropoff_area_start_time, 2)))
             if DEBUG & (DEBUG_TASKS): logging.info("Task - Loiter assignments: {}".format(game.loiter_assignments))
     else:
         target_sets = {}
 
+    deadline.end_phase()
+
     if DEBUG & (DEBUG_TIMING): logging.info("Time - Turn setup elapsed time: {}".format(round(time.time() - turn_start_time, 2)))
 
     #
@@ -408,35 +344,38 @@ while True:
     # traffic issues around bases until better collision mgmt is in place
     my_ships.sort(key = lambda s: s.halite_amount, reverse = True)
 
-    for ship in my_ships:
-        if ship.id in ship_states:
-
-            # we calc mined amount and fuel cost based on the diff of what we had
-            # last turn and what the server says we have now
-            if ship.halite_amount != ship_states[ship.id]["prior_halite_amount"]:
-                if ship.halite_amount == 0:
-                    fuel_cost = math.floor(game_map[ship_states[ship.id]["prior_position"]].halite_amount * .1)
-                    gathered = ship_states[ship.id]["prior_halite_amount"] - fuel_cost
-                    turn_gathered += gathered
-                    game_metrics["gathered"].append((game.turn_number, ship.id, gathered))
-                elif ship.halite_amount < ship_states[ship.id]["prior_halite_amount"]:
-                    fuel_cost = ship_states[ship.id]["prior_halite_amount"] - ship.halite_amount
-                    game_metrics["burned"].append((game.turn_number, ship.id, fuel_cost))
-                else:
-                    mined = ship.halite_amount - ship_states[ship.id]["prior_halite_amount"]
-                    game_metrics["mined"].append((game.turn_number, ship.id, mined))
+    # keyed on ship id, ships that moved this turn and the halite they delivered
+    moved_ships = set()
+    deposits = {}
 
-        else:
-            if DEBUG & (DEBUG_GAME): logging.info("Game - Ship {} is a new ship. t{}".format(ship.id, game.turn_number))
+    # mined amount, fuel cost and deliveries come from the diff of what we had last turn
+    # and what the server says we have now, see ShipRegistry.get_events()
+    for event in game.ship_events:
+        if event.owner != me.id:
+            continue
+
+        if event.type == EVENT_SPAWNED:
             me.ship_count += 1
 
             turn_spent += constants.SHIP_COST
             game_metrics["spent"].append((game.turn_number, turn_spent))
+        elif event.type == EVENT_DEPOSITED:
+            turn_gathered += event.amount
+            deposits[event.ship_id] = event.amount
+            game_metrics["gathered"].append((game.turn_number, event.ship_id, event.amount))
+        elif event.type == EVENT_MOVED:
+            moved_ships.add(event.ship_id)
+            if event.amount > 0:
+                game_metrics["burned"].append((game.turn_number, event.ship_id, event.amount))
+        elif event.type == EVENT_MINED:
+            game_metrics["mined"].append((game.turn_number, event.ship_id, event.amount))
+
+    for ship in my_ships:
+        if not ship.id in ship_states:
+            if DEBUG & (DEBUG_GAME): logging.info("Game - Ship {} is a new ship. t{}".format(ship.id, game.turn_number))
 
             ship_states[ship.id] = {
                 "last_seen": game.turn_number,
-                "prior_position": None,
-                "prior_halite_amount": 0,
                 "status": "returning",
                 "last_dock": game.turn_number,
                 "christening": game.turn_number,
@@ -475,9 +414,6 @@ while True:
         if ship_states[ship.id]["position"] and ship.position != ship_states[ship.id]["position"]:
             logging.warn("Ship {} has an inconsistent position. State: {}, Server: {}. t{}".format(ship.id, ship_states[ship.id]["position"], ship.position, game.turn_number))
 
-        # note, some ship state attribs are not stored on the actual ship object:
-        # e.g. prior_position, prior_halite_amount
-
     #
     # update stats - update the mining rate as soon as ships are parsed so updated rate is available
     #
@@ -504,34 +440,36 @@ while True:
     homing_count = 0
     remaining_turns = constants.MAX_TURNS - game.turn_number
     if remaining_turns <= game_map.width:
-        for s in my_ships:
-            if s.status != "homing" and game_map.calculate_distance(s.position, get_base_positions(game, s.position)) * HOMING_OVERHEAD >= remaining_turns:
-                if not game.end_game:
-                    if DEBUG & (DEBUG_GAME): logging.info("Game - End game reached at turn {}".format(game.turn_number))
-                    game.end_game = game.turn_number
+        # distance and path to the closest base for every cell, shared by all homing ships
+        homing_field = game_map.get_flow_field(get_base_positions(game), "turns")
 
-                s.path.clear()
-                s.status = "homing"
+        # ships that have to head home now, in my_ships order
+        ship_table = make_ship_table(my_ships)
+        homing_distance = homing_field.distance[ship_table.y, ship_table.x]
+        homing_candidates = (ship_table.status != STATUS_CODES["homing"]) & (homing_distance * HOMING_OVERHEAD >= remaining_turns)
 
-                base_position = get_base_positions(game, s.position)
-                arrival_direction = game_map.get_relative_direction(base_position, s.position)
-                arrival_offset = DIRECTIONS[arrival_direction]
-                arrival_point = base_position + Position(arrival_offset[0], arrival_offset[1])
+        for s in ship_table.select(homing_candidates).ships:
+            if not game.end_game:
+                if DEBUG & (DEBUG_GAME): logging.info("Game - End game reached at turn {}".format(game.turn_number))
+                game.end_game = game.turn_number
 
-                s.path, cost = game_map.navigate(s.position, arrival_point, "astar", {"move_cost_type": "turns"})
+            s.path.clear()
+            s.status = "homing"
 
-                if s.path is None:
-                    logging.error("Homeing path is None. Setting path to []".format())
-                    s.path = [arrival_point]
-                else:
-                    s.path.insert(0, base_position)
+            base_position = homing_field.get_destination(s.position)
+
+            s.path = homing_field.get_path(s.position)
+
+            if s.path is None:
+                logging.error("Homeing path is None. Setting path to []".format())
+                s.path = [base_position]
 
-                homing_count += 1
+            homing_count += 1
 
-                if DEBUG & (DEBUG_GAME): logging.info("Game - Ship {} is now homing from the {}. t{}".format(s.id, arrival_direction, game.turn_number))
+            if DEBUG & (DEBUG_GAME): logging.info("Game - Ship {} is now homing to {}. t{}".format(s.id, base_position, game.turn_number))
 
-                if homing_count >= 4:
-                    break
+            if homing_count >= 4:
+                break
     #
     # Dropoff tasking
     #
@@ -563,13 +501,10 @@ while True:
             continue
 
         deployment_ship = False
-        deployment_distance = False
 
-        for ship in my_ships:
-             distance = game.game_map.calculate_distance(ship.position, deployment_point)
-             if not deployment_ship or distance < deployment_distance:
-                deployment_ship = ship
-                deployment_distance = distance
+        nearest = game.ship_index.get_nearest(deployment_point, 1, owner = me.id)
+        if nearest:
+            deployment_ship = nearest[0][0]
 
         if deployment_ship:
             dropoff_deployment_queue.pop()
@@ -581,10 +516,52 @@ while True:
         else:
             logging.warn("No ship available to deploy dropoff {}. Deployment failed. Will retry.".format(deployment_point))
 
+    #
+    # assign targets to all ships docking this turn at once, a ship may get a target from any
+    # base's target set. A target's yield is its cv value with its base's travel added back,
+    # each ship is charged its own travel to the target
+    #
+    deadline.start_phase("assignment")
+
+    target_assignments = {} # keyed on ship id, (position, value, halite)
+
+    if target_sets and not game.end_game:
+        docking_ships = [s for s in my_ships if s.status != "homing" and s.status != "tasked" and s.position in target_sets and s.position == get_base_positions(game, s.position)]
+        targets = [target for target_key in target_sets for target in target_sets[target_key]]
+
+        if docking_ships and targets:
+            travel_cost = mining_rate_mult * game.get_mining_rate()
+            target_yields = [target[1] + travel_cost * game_map.calculate_distance(target_key, target[0]) for target_key in target_sets for target in target_sets[target_key]]
+
+            values = get_target_values([game_map.get_distance_map(s.position) for s in docking_ships], [target[0] for target in targets], target_yields, travel_cost)
+
+            for ship_idx, target_idx in assign_targets(values).items():
+                target_assignments[docking_ships[ship_idx].id] = targets[target_idx]
+
+            if DEBUG & (DEBUG_TASKS): logging.info("Task - Assigned {} of {} targets to {} docking ships".format(len(target_assignments), len(targets), len(docking_ships)))
+
+    # ships following another ship's reserved path move after the ship ahead of them. This
+    # overrides the halite descending order above for followers, a follower with more halite
+    # than its leader moves after it
+    my_ships = order_by_reservations(my_ships, game_map.reservations, game_map.width)
+
+    deadline.start_phase("ship_moves")
+
     #
     # handle each ship for this turn
     #
     for ship in my_ships:
+        # out of time, the remaining ships hold their position. Ships are ordered so that
+        # no ship that already moved is following one of them
+        if deadline.degrade("ship_move"):
+            game.command_queue[ship.id] = ship.stay_still()
+            game_map.reservations.reserve(ship.id, [ship.position.y * game_map.width + ship.position.x], game.turn_number + 1)
+            ship_states[ship.id]["position"] = ship.position
+            continue
+
+        # cap A* searches when the turn is running short on time
+        astar_limits = {"max_expansions": DEADLINE_ASTAR_MAX_EXPANSIONS} if deadline.degrade("astar") else {}
+
         base_position = get_base_positions(game, ship.position)
 
         if DEBUG & (DEBUG_GAME) and ship.christening != game.turn_number:
@@ -631,8 +608,8 @@ while True:
                         if DEBUG & (DEBUG_NAV): logging.info("Nav  - Clear request canceled for {}. Cell is clear".format(clear_request["position"]))
 
                 # log some data about the previous assignment
-                if game.turn_number != ship.christening and ship_states[ship.id]["prior_position"] and ship_states[ship.id]["prior_position"] != base_position:
-                    drop_amount = ship_states[ship.id]["prior_halite_amount"]
+                if game.turn_number != ship.christening and ship.id in moved_ships:
+                    drop_amount = deposits.get(ship.id, 0)
 
                     game_metrics["assn_duration"].append((game.turn_number, ship.id, game.turn_number - ship.last_dock))
                     game_metrics["assn_duration2"].append((game.turn_number, ship.id, ship.assignment_duration))
@@ -660,10 +637,10 @@ while True:
                 #
 
                 if base_position in target_sets:
-                    if not target_sets[base_position]:
+                    if not (ship.id in target_assignments):
                         continue
 
-                    assignment_target = target_sets[base_position].pop()
+                    assignment_target = target_assignments[ship.id]
                     loiter_point = assignment_target[0]
 
                     if assignment_target[2] < (ship.mining_threshold * 1.32):
@@ -671,7 +648,7 @@ while True:
                         ship.mining_threshold = 25
 
                     game.update_loiter_assignment(ship, loiter_point)
-                    if DEBUG & (DEBUG_TASKS): logging.info("Task - Ship {} assigned loiter point {} off target list. {} targets remain, t{}".format(ship.id, loiter_point, len(target_sets[base_position]), game.turn_number))
+                    if DEBUG & (DEBUG_TASKS): logging.info("Task - Ship {} assigned loiter point {} off target list, value {}. t{}".format(ship.id, loiter_point, assignment_target[1], game.turn_number))
                 else:
                     loiter_point = get_loiter_point(game, ship)
                     if DEBUG & (DEBUG_TASKS): logging.info("Task - Ship {} No targets remain, using random loiter point {}".format(ship.id, loiter_point))
@@ -680,7 +657,7 @@ while True:
 
                 # calc the path for the assignment from departure point to loiter point. If for some reason
                 # ship departs wrong side, never cross back over base/current position
-                ship.path, cost = game_map.navigate(departure_point, loiter_point, "astar", {"move_cost_type": "turns", "excludes": [ship.position]})
+                ship.path, cost = game_map.navigate(departure_point, loiter_point, "astar", dict({"move_cost_type": "turns", "excludes": [ship.position]}, **astar_limits))
 
                 if ship.path is None: # path will be [] if loiter_point is closer than the departure point
                     logging.error("Ship {} Error, navigate failed for loiter point {}, path:{}".format(ship.id, loiter_point, ship.path))
@@ -722,7 +699,7 @@ while True:
                 if DEBUG & (DEBUG_GAME): logging.info("Ship - Ship {} at {} is full and did not reach loiter assignment {}. Cleared assignment. t{}".format(ship.id, ship.position, ship.assignments[-1], game.turn_number))
                 game.update_loiter_assignment(ship)
 
-            ship.path, cost = game_map.navigate(ship.position, base_position, "dock") # returning to base
+            ship.path, cost = game_map.navigate(ship.position, base_position, "flow", {"move_cost_type": "turns", "entry_lanes": "n-s", "ship_id": ship.id}) # returning to base
 
             if not ship.path:
                 ship.path = [] # path might be None if failed
@@ -770,7 +747,7 @@ while True:
             if ship.status == "exploring":
                 move = get_move(game, ship, "density")
             elif ship.status == "transiting":
-                move = get_move(game, ship, "nav", {"waypoint_algorithm": "astar", "move_cost_type": "turns"}) # path scheme = algo for incomplete path
+                move = get_move(game, ship, "nav", dict({"waypoint_algorithm": "astar", "move_cost_type": "turns"}, **astar_limits)) # path scheme = algo for incomplete path
             elif ship.status == "returning":
                 move = get_move(game, ship, "nav", {"waypoint_algorithm": "naive"}) # returning will break if a waypoint resolution other than naive is used. Why?
             elif ship.status == "tasked":
@@ -783,7 +760,7 @@ while True:
                 if ship.position == base_position:
                     move = "o"
                 else:
-                    move = get_move(game, ship, "nav", {"waypoint_algorithm": "astar", "move_cost_type": "turns"}) # path scheme = algo for incomplete path
+                    move = get_move(game, ship, "nav", dict({"waypoint_algorithm": "astar", "move_cost_type": "turns"}, **astar_limits)) # path scheme = algo for incomplete path
             else:
                 raise RuntimeError("Ship {} has an invalid status: {}".format(ship.id, ship.status))
 
@@ -811,8 +788,6 @@ while True:
         #
         ship_states[ship.id]["status"] = ship.status
         ship_states[ship.id]["path"] = ship.path
-        ship_states[ship.id]["prior_position"] = ship.position
-        ship_states[ship.id]["prior_halite_amount"] = ship.halite_amount
         ship_states[ship.id]["last_seen"] = ship.last_seen
         ship_states[ship.id]["christening"] = ship.christening
         ship_states[ship.id]["last_dock"] = ship.last_dock
@@ -833,27 +808,27 @@ while True:
     #
     # check of lost ships
     #
-    lost_ships = []
-    for s_id in ship_states:
-        if not me.has_ship(s_id):
-            lost_ships.append(s_id)
+    # destroyed events hold the last seen position and cargo of the ship. The ship was lost on
+    # the cell it moved into, the position recorded in its state
+    lost_ships = [e for e in game.ship_events if e.type == EVENT_DESTROYED and e.owner == me.id and e.ship_id in ship_states]
 
     base_list = get_base_positions(game)
-    for s_id in lost_ships:
+    for event in lost_ships:
+        s_id = event.ship_id
         lost_ship_position = ship_states[s_id]["position"]
         if not (lost_ship_position in base_list):
             sos_evt = {
                 "s_id": s_id,
-                "halite_amount": ship_states[s_id]["prior_halite_amount"],
+                "halite_amount": event.halite,
                 "position": lost_ship_position
             }
             game.sos_calls.append(sos_evt)
 
         if lost_ship_position in base_list:
-            game_metrics["gathered"].append((ship_states[s_id]["last_seen"], s_id, ship_states[s_id]["prior_halite_amount"]))
-            turn_gathered += ship_states[s_id]["prior_halite_amount"]
+            game_metrics["gathered"].append((ship_states[s_id]["last_seen"], s_id, event.halite))
+            turn_gathered += event.halite
         else:
-            if DEBUG & (DEBUG_GAME): logging.info("Game - Ship {} lost. Last seen at {} on turn {} with {} halite. t{}".format(s_id, ship_states[s_id]["prior_position"], ship_states[s_id]["last_seen"], ship_states[s_id]["prior_halite_amount"], game.turn_number))
+            if DEBUG & (DEBUG_GAME): logging.info("Game - Ship {} lost. Last seen at {} on turn {} with {} halite. t{}".format(s_id, event.position, ship_states[s_id]["last_seen"], event.halite, game.turn_number))
 
         ship_states.pop(s_id, None)
 
@@ -870,28 +845,22 @@ while True:
     #
 
     if DEBUG & (DEBUG_GAME_METRICS):
-        mined_this_turn = sum(map(lambda i: i[2] if i[0] == game.turn_number else 0, game_metrics["mined"]))
+        mined_this_turn = game_metrics["mined"].get_turn_total(game.turn_number)
         logging.info("Game - Mined this turn: {}".format(mined_this_turn))
         logging.info("Game - Turn mining rate: {}".format(0 if not len(my_ships) else round(mined_this_turn / len(my_ships), 2)))
         logging.info("Game - Mining rate: {}".format(round(game.get_mining_rate(), 2)))
 
-        logging.info("Game - Total mined: {}".format(sum(x[2] for x in game_metrics["mined"])))
-        logging.info("Game - Total gathered: {}".format(sum(x[2] for x in game_metrics["gathered"])))
-        logging.info("Game - Total burned: {}".format(sum(x[2] for x in game_metrics["burned"])))
+        logging.info("Game - Total mined: {}".format(game_metrics["mined"].total))
+        logging.info("Game - Total gathered: {}".format(game_metrics["gathered"].total))
+        logging.info("Game - Total burned: {}".format(game_metrics["burned"].total))
 
         # profit = gathered - spent
         logging.info("Game - Profit: turn: {},  cumulative: {}".format(turn_profit, cumulative_profit))
 
     if DEBUG & (DEBUG_SHIP_METRICS):
-        mined_by_ship= {}
         avg_mined_by_ship = {}
         oldest_turn = 1 if game.turn_number < MINING_RATE_LOOKBACK else (game.turn_number - MINING_RATE_LOOKBACK)
-        i = len(game.game_metrics["mined"]) - 1
-        while i >= 0 and game.game_metrics["mined"][i][0] >= oldest_turn:
-            s_id = game.game_metrics["mined"][i][1]
-            halite = game.game_metrics["mined"][i][2]
-            mined_by_ship[s_id] = (mined_by_ship[s_id] + halite) if s_id in mined_by_ship else halite
-            i -= 1
+        mined_by_ship = game_metrics["mined"].get_window_key_totals(oldest_turn)
 
         for s_id, halite in mined_by_ship.items():
             avg_mined_by_ship[s_id] = halite / (game.turn_number - game.ship_christenings[s_id] - 1)
@@ -905,9 +874,9 @@ while True:
             logging.info("Game - {:4d}: {}".format(s_id, halite))
 
     if DEBUG & (DEBUG_TIMING):
-        logging.info("Time - Min turn time: {}".format(min(game_metrics["turn_time"], key = lambda t: t[1])))
-        logging.info("Time - Max turn time: {}".format(max(game_metrics["turn_time"], key = lambda t: t[1])))
-        logging.info("Time - Avg turn time: {:.4f}".format(np.mean(game_metrics["turn_time"], axis=0)[1]))
+        logging.info("Time - Min turn time: {}".format(game_metrics["turn_time"].min_row))
+        logging.info("Time - Max turn time: {}".format(game_metrics["turn_time"].max_row))
+        logging.info("Time - Avg turn time: {:.4f}".format(game_metrics["turn_time"].get_mean()))
         logging.info("Time - Turn time: {}".format(round(time.time() - turn_start_time, 4)))
 
     #
@@ -921,10 +890,10 @@ while True:
             pr.dump_stats("profiler_results." + "{}".format(round(time.time())) + ".dmp")
 
         if DEBUG & (DEBUG_NAV_METRICS):
-            logging.info("Nav  - Loiter multiples: {}".format(game_metrics["loiter_multiples"]))
-            logging.info("Nav  - Loiter offsets: {}".format(game_metrics["loiter_offsets"]))
-            logging.info("Nav  - Loiter distances: {}".format(game_metrics["loiter_distances"]))
-            logging.info("Nav  - Raw loiter points: {}".format(game_metrics["raw_loiter_points"]))
+            logging.info("Nav  - Loiter multiples: {}".format(list(game_metrics["loiter_multiples"])))
+            logging.info("Nav  - Loiter offsets: {}".format(list(game_metrics["loiter_offsets"])))
+            logging.info("Nav  - Loiter distances: {}".format(list(game_metrics["loiter_distances"])))
+            logging.info("Nav  - Raw loiter points: {}".format(list(game_metrics["raw_loiter_points"])))
 
         if DEBUG & (DEBUG_GAME_METRICS):
             avg_trip_duration = 0
@@ -935,42 +904,38 @@ while True:
             logging.info("Game - Total trips completed: {}".format(len(game_metrics["assn_duration"])))
 
             if game_metrics["assn_drop_amount"]:
-                avg_halite_gathered = round(np.mean(game_metrics["assn_drop_amount"], axis=0)[3], 2)
+                avg_halite_gathered = round(game_metrics["assn_drop_amount"].get_mean("halite"), 2)
                 logging.info("Game - Avg. halite gathered: {}".format(avg_halite_gathered))
 
             # all the keys below area
             if game_metrics["assn_duration"]:
-                avg_trip_duration = round(np.mean(game_metrics["assn_duration"], axis=0)[2], 2)
-                avg_trip_duration2 = round(np.mean(game_metrics["assn_duration2"], axis=0)[2], 2)
+                avg_trip_duration = round(game_metrics["assn_duration"].get_mean("duration"), 2)
+                avg_trip_duration2 = round(game_metrics["assn_duration2"].get_mean("duration"), 2)
                 logging.info("Game - Avg. trip duration: {} / ".format(avg_trip_duration, avg_trip_duration2))
 
             if game_metrics["assn_explore_duration"]:
                 # trip_explore_duration 0:turn (end of explore) 1:ship 2:duration 3:distance from base
-                trip_explore_duration = round(np.mean(game_metrics["assn_explore_duration"], axis=0)[3], 2)
+                trip_explore_duration = round(game_metrics["assn_explore_duration"].get_mean("distance"), 2)
                 logging.info("Game - Avg. explore duration: {}".format(trip_explore_duration))
 
             if game_metrics["assn_transit_duration"]:
                 # trip_transit_duration 0:turn (end of return) 1:ship 2:duration 3:distance from base
-                trip_transit_duration = round(np.mean(game_metrics["assn_transit_duration"], axis=0)[2], 2)
+                trip_transit_duration = round(game_metrics["assn_transit_duration"].get_mean("duration"), 2)
                 logging.info("Game - Avg. transit duration: {}".format(trip_transit_duration))
 
             avg_return_duration = avg_trip_duration - trip_explore_duration - trip_transit_duration
             logging.info("Game - Avg. return duration: {}".format(round(avg_return_duration, 2)))
 
-            mined_by_ship = {}
-            for line in game.game_metrics["mined"]:
-                s_id = line[1]
-                halite = line[2]
-                mined_by_ship[s_id] = (mined_by_ship[s_id] + halite) if s_id in mined_by_ship else halite
+            mined_by_ship = game_metrics["mined"].key_totals
 
             logging.info("Game - Ship yields:")
             for s_id, halite in sorted(mined_by_ship.items()):
                 logging.info("Game - {:4d}: {}".format(s_id, halite))
 
         if DEBUG & (DEBUG_TIMING):
-            logging.info("Time - Min. turn time: {}".format(min(game_metrics["turn_time"], key = lambda t: t[1])))
-            logging.info("Time - Max. turn time: {}".format(max(game_metrics["turn_time"], key = lambda t: t[1])))
-            logging.info("Time - Avg. turn time: {:.4f}".format(np.mean(game_metrics["turn_time"], axis=0)[1]))
+            logging.info("Time - Min. turn time: {}".format(game_metrics["turn_time"].min_row))
+            logging.info("Time - Max. turn time: {}".format(game_metrics["turn_time"].max_row))
+            logging.info("Time - Avg. turn time: {:.4f}".format(game_metrics["turn_time"].get_mean()))
             logging.info("Time - Elapsed time: {}".format(round(time.time() - game_start_time, 2)))
 
         if DEBUG & (DEBUG_OUTPUT_GAME_METRICS):
@@ -979,7 +944,8 @@ while True:
     #
     # resolve collisions
     #
-    resolve_collsions(game, ship_states)
+    deadline.start_phase("collisions")
+    resolve_collsions(game, ship_states, deadline)
 
     # dump ship states after collision resolution
     if DEBUG & (DEBUG_SHIP_STATES): logging.info("Game - end ship_states:\n{}".format(ship_states_to_string(ship_states)))
@@ -991,6 +957,8 @@ while True:
 
     if (DEBUG & (DEBUG_COMMANDS)): logging.info("Game - command queue: {}".format(game.command_queue))
 
+    deadline.log()
+
     # Send your moves back to the game environment, ending this turn.
     game.end_turn(list(game.command_queue.values()))
 
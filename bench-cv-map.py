@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Python 3.6
+
+#
+# Compare the vectorized cell value map with the per cell reference (GameMap.get_cell_value)
+# on random maps. Reports mismatches and timings.
+#
+
+import sys
+import time
+import getopt
+import numpy as np
+
+from hlt import constants
+from hlt.game_map import GameMap
+from hlt.positionals import Position
+
+try:
+   opts, args = getopt.getopt(sys.argv[1:] , "hvn:", ["help", "verbose"])
+except getopt.GetoptError:
+   print(sys.argv[0])
+   sys.exit(2)
+
+def usage():
+    program_name = sys.argv[0]
+    print("Usage: {} [options] [map sizes]".format(program_name))
+    print("-h\tHelp.")
+    print("-v\tVerbose.")
+    print("-n\tNumber of random maps per size. Default 3.")
+    print("")
+    print("\nExample:")
+    print("./bench-cv-map.py -n 5 32 48 64")
+
+def main():
+    verbose = False
+    map_count = 3
+    map_sizes = [32, 40, 48, 56, 64]
+
+    for o, a in opts:
+        if o == "-v":
+            verbose = True
+        elif o == "-n":
+            map_count = int(a)
+        elif o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        else:
+            assert False, "unhandled option"
+
+    if args:
+        map_sizes = [int(a) for a in args]
+
+    rng = np.random.RandomState(0)
+    failed = False
+
+    for size in map_sizes:
+        constants.set_dimensions(size, size)
+
+        ref_time = 0.
+        new_time = 0.
+
+        for _ in range(map_count):
+            game_map = GameMap(rng.randint(0, 1000, (size, size)), size, size)
+            base = Position(rng.randint(size), rng.randint(size))
+            distance_constant = rng.uniform(.5, 20.)
+
+            # otypes is required, otherwise np.vectorize() infers an int map whenever the
+            # first cell is floored at -1000 and truncates every value
+            start_time = time.time()
+            expected = np.vectorize(game_map.get_cell_value, otypes=[np.float64])(base, game_map.get_coord_map(), distance_constant)
+            ref_time += time.time() - start_time
+
+            start_time = time.time()
+            actual = game_map.get_cell_value_map(base, distance_constant)
+            new_time += time.time() - start_time
+
+            mismatches = np.count_nonzero(expected != actual)
+            if mismatches:
+                failed = True
+                print("{}x{} base {}: {} mismatched cells".format(size, size, base, mismatches))
+            elif verbose:
+                print("{}x{} base {}: ok".format(size, size, base))
+
+        print("{}x{}: reference {:.4f}s, vectorized {:.5f}s per map".format(size, size, ref_time / map_count, new_time / map_count))
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,89 @@
+import sys
+import logging
+import itertools
+import numpy as np
+
 # Placed here to avoid circular imports
 def read_input():
     """
     Reads input from stdin, shutting down logging and exiting if an EOFError occurs
+
+    Note: All input is read from sys.stdin.buffer, don't mix with input(). The text layer
+    reads ahead and would swallow lines meant for read_frame().
+
     :return: input read
     """
-    try:
-        return input()
-    except EOFError as eof:
+    line = sys.stdin.buffer.readline()
+
+    if not line:
+        eof = EOFError("EOF when reading a line")
         logging.shutdown()
         raise SystemExit(eof)
+
+    return line.decode().rstrip("\n")
+
+def read_ints(line_count, column_count):
+    """
+    Reads line_count lines of integers and parses them in one pass
+
+    :param line_count: Number of lines to read
+    :param column_count: Number of integers per line
+    :return: A line_count x column_count numpy array, dtype=int
+    """
+    if line_count == 0:
+        return np.empty((0, column_count), dtype=np.int64)
+
+    data = b"".join(itertools.islice(sys.stdin.buffer, line_count))
+
+    values = np.fromstring(data, dtype=np.int64, sep=" ")
+
+    if values.size != line_count * column_count:
+        logging.shutdown()
+        raise SystemExit(EOFError("Expected {} lines of {} integers, got {} integers".format(line_count, column_count, values.size)))
+
+    return values.reshape(line_count, column_count)
+
+class Frame:
+    """
+    A turn's worth of engine input
+
+    :param turn_number
+    :param players: Px4 numpy array of (player id, ship count, dropoff count, halite)
+    :param ships: List, per player row, of Nx4 numpy arrays of (ship id, x, y, halite)
+    :param dropoffs: List, per player row, of Nx3 numpy arrays of (dropoff id, x, y)
+    :param cells: Nx3 numpy array of changed cells (x, y, halite)
+    """
+    def __init__(self, turn_number, players, ships, dropoffs, cells):
+        self.turn_number = turn_number
+        self.players = players
+        self.ships = ships
+        self.dropoffs = dropoffs
+        self.cells = cells
+
+def read_frame(player_count, on_turn_start=None):
+    """
+    Reads a turn from stdin. Only the count lines are read one at a time, entity and cell
+    lines are read and parsed in bulk.
+
+    :param player_count: Number of players in the game
+    :param on_turn_start: Called with the turn number as soon as it's read, before the rest
+        of the frame is parsed. None for no call
+    :return: A Frame
+    """
+    turn_number = int(read_input())
+
+    if on_turn_start is not None:
+        on_turn_start(turn_number)
+
+    players = np.empty((player_count, 4), dtype=np.int64)
+    ships = []
+    dropoffs = []
+
+    for i in range(player_count):
+        players[i] = read_ints(1, 4)[0]
+        ships.append(read_ints(int(players[i, 1]), 4))
+        dropoffs.append(read_ints(int(players[i, 2]), 3))
+
+    cells = read_ints(int(read_input()), 3)
+
+    return Frame(turn_number, players, ships, dropoffs, cells)
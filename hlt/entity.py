@@ -1,10 +1,17 @@
 import abc
 
 from . import commands, constants
-from .positionals import Direction, Position
+from .positionals import Direction, Position, get_position_table
 from .common import read_input
+from .ship_registry import ShipRegistry
 
 
+def _get_position(x, y):
+    """
+    :return Returns the shared Position for an engine (normalized) position.
+    """
+    return get_position_table(constants.WIDTH, constants.HEIGHT)[y * constants.WIDTH + x]
+
 class Entity(abc.ABC):
     """
     Base Entity Class from whence Ships, Dropoffs and Shipyards inherit
@@ -15,14 +22,18 @@ class Entity(abc.ABC):
         self.position = position
 
     @staticmethod
-    def _generate(player_id):
+    def _generate(player_id, values=None):
         """
         Method which creates an entity for a specific player given input from the engine.
         :param player_id: The player id for the player who owns this entity
+        :param values: (id, x, y) already read from the engine, read from stdin if None
         :return: An instance of Entity along with its id
         """
-        ship_id, x_position, y_position = map(int, read_input().split())
-        return ship_id, Entity(player_id, ship_id, Position(x_position, y_position))
+        if values is None:
+            values = map(int, read_input().split())
+
+        ship_id, x_position, y_position = values
+        return ship_id, Entity(player_id, ship_id, _get_position(x_position, y_position))
 
     def __repr__(self):
         return "{}(id={}, {})".format(self.__class__.__name__,
@@ -56,7 +67,8 @@ class Ship(Entity):
     """
     Ship class to house ship entities
     """
-    __ships = {}
+    # live ships of all players, keyed on ship id
+    registry = ShipRegistry()
 
     count = 0
 
@@ -104,27 +116,31 @@ class Ship(Entity):
         return "{} {} {}".format(commands.MOVE, self.id, commands.STAY_STILL)
 
     @staticmethod
-    def _generate(player_id):
+    def _generate(player_id, values=None):
         """
         Creates an instance of a ship for a given player given the engine's input.
         If an instance with the same ship.id has previously been generated, that instance will be returned.
         :param player_id: The id of the player who owns this ship
+        :param values: (id, x, y, halite) already read from the engine, read from stdin if None
         :return: The ship id and ship object
         """
         # Read game engine input
-        ship_id, x_position, y_position, halite = map(int, read_input().split())
+        if values is None:
+            values = map(int, read_input().split())
+
+        ship_id, x_position, y_position, halite = values
 
-        # Check storage to see if ship already exists
+        # Check the registry to see if ship already exists
         # If the ship exists, update its position and halite
-        if ship_id in Ship.__ships.keys():
-            old_ship = Ship.__ships[ship_id]
-            old_ship.position = Position(x_position, y_position)
+        old_ship = Ship.registry.get(ship_id)
+        if old_ship is not None:
+            old_ship.position = _get_position(x_position, y_position)
             old_ship.halite_amount = halite
             return ship_id, old_ship
         else:
-            # Otherwise, create and return a new instance
-            new_ship = Ship(player_id, ship_id, Position(x_position, y_position), halite)
-            Ship.__ships[ship_id] = new_ship
+            # Otherwise, create, register and return a new instance
+            new_ship = Ship(player_id, ship_id, _get_position(x_position, y_position), halite)
+            Ship.registry.add(new_ship)
             return ship_id, new_ship
 
     def __repr__(self):
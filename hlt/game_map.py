@@ -11,50 +11,106 @@ from operator import itemgetter
 from . import constants
 from .entity import Entity, Shipyard, Ship, Dropoff
 from .player import Player
-from .positionals import Direction, Position
-from .common import read_input
+from .positionals import Direction, Position, get_position_table
+from .common import read_input, read_ints
 
 from myutils.cell_block import CellBlock
+from myutils.cell_value_map import cell_value_map, cell_value_stack
+from myutils.block_stats import get_block_stats
+from myutils.distance_maps import get_distance_map
+from myutils.astar import astar, astar_reserved
+from myutils.flow_field import make_flow_field
+from myutils.reservations import ReservationTable
+from myutils.threat_field import make_threat_field
+from myutils.inspiration import make_inspiration_field
 
 from myutils.utils import check_enemy_ships
 
-from myutils.constants import DIRECTIONS, SHIP_FUEL_COST
+from myutils.constants import DIRECTIONS, SHIP_FUEL_COST, DEPARTURE_DISTANCE, RESERVATION_HORIZON, RESERVATION_MAX_EXPANSIONS
+
+# structure type codes stored in GameMap._structure_type_map
+STRUCTURE_NONE = 0
+STRUCTURE_SHIPYARD = 1
+STRUCTURE_DROPOFF = 2
 
 class MapCell:
-    """A cell on the game map."""
-    def __init__(self, position, halite_amount):
+    """
+    A cell on the game map.
+
+    Cells don't hold any state of their own, they're a view into the GameMap arrays so
+    that map-wide consumers can work on the arrays directly.
+    """
+    __slots__ = ("_game_map", "position")
+
+    def __init__(self, game_map, position):
+        self._game_map = game_map
         self.position = position
-        self.halite_amount = halite_amount
-        self.ship = None
-        self.structure = None
+
+    @property
+    def halite_amount(self):
+        """
+        :return: The amount of halite in this cell
+        """
+        return int(self._game_map._halite_map[self.position.y, self.position.x])
+
+    @halite_amount.setter
+    def halite_amount(self, halite_amount):
+        self._game_map._halite_map[self.position.y, self.position.x] = halite_amount
+
+    @property
+    def ship(self):
+        """
+        :return: The ship in this cell or None
+        """
+        ship_id = self._game_map._ship_id_map[self.position.y, self.position.x]
+        return None if ship_id == -1 else self._game_map._ships[ship_id]
+
+    @ship.setter
+    def ship(self, ship):
+        if ship is None:
+            self.mark_safe()
+        else:
+            self.mark_unsafe(ship)
+
+    @property
+    def structure(self):
+        """
+        :return: The structure in this cell or None
+        """
+        return self._game_map._structures.get((self.position.x, self.position.y))
+
+    @structure.setter
+    def structure(self, structure):
+        self._game_map._set_structure(self.position.x, self.position.y, structure)
 
     @property
     def is_empty(self):
         """
         :return: Whether this cell has no ships or structures
         """
-        return self.ship is None and self.structure is None
+        return not self.is_occupied and not self.has_structure
 
     @property
     def is_occupied(self):
         """
         :return: Whether this cell has any ships
         """
-        return self.ship is not None
+        return self._game_map._ship_id_map[self.position.y, self.position.x] != -1
 
     @property
     def has_structure(self):
         """
         :return: Whether this cell has any structures
         """
-        return self.structure is not None
+        return self._game_map._structure_type_map[self.position.y, self.position.x] != STRUCTURE_NONE
 
     @property
     def structure_type(self):
         """
         :return: What is the structure type in this cell
         """
-        return None if not self.structure else type(self.structure)
+        structure = self.structure
+        return None if not structure else type(structure)
 
     def mark_unsafe(self, ship):
         """
@@ -62,14 +118,14 @@ class MapCell:
 
         Use in conjunction with GameMap.naive_navigate.
         """
-        self.ship = ship
+        self._game_map._set_ship(self.position.x, self.position.y, ship)
 
     def mark_safe(self):
         """
         Mark this cell as safe (unoccupied) for navigation.
 
         """
-        self.ship = None
+        self._game_map._ship_id_map[self.position.y, self.position.x] = -1
 
     def __eq__(self, other):
         return self.position == other.position
@@ -94,35 +150,57 @@ class GameMap:
     # local debug flag
     DEBUG = False
 
-    def __init__(self, cells, width, height):
+    def __init__(self, halite_map, width, height):
         self.width = width
         self.height = height
-        self._cells = cells
 
-        # numpy array, dtype=float
-        self._halite_map = None
+        # shared normalized Positions, indexed y * width + x
+        self._positions = get_position_table(self.width, self.height)
+
+        # MapCell views, created on first access. Indexed y * width + x
+        self._cells = [None] * (self.width * self.height)
+
+        # numpy array, dtype=float. This is the halite store, MapCells read/write it directly
+        self._halite_map = np.array(halite_map, dtype="float32").reshape(self.height, self.width)
+
+        # numpy array, dtype=int. -1 == no ship
+        self._ship_id_map = np.full((self.height, self.width), -1, dtype=np.int32)
 
-        # numpy array, dtype=object
-        self._coord_map = np.empty((self.width, self.height), dtype=object)
+        # ship objects for the ship ids in _ship_id_map, keyed on ship id
+        self._ships = {}
+
+        # numpy array, dtype=int. See STRUCTURE_* for values
+        self._structure_type_map = np.full((self.height, self.width), STRUCTURE_NONE, dtype=np.int8)
+
+        # structure objects for the cells in _structure_type_map, keyed on (x, y)
+        self._structures = {}
+
+        # numpy array, dtype=object. Built on first use, see get_coord_map()
+        self._coord_map = None
 
         # dictionary of numpy arrays, dtype=float
         self._cell_value_maps = {}
 
-        #
-        self._distance_maps = {}
+        # CellValueStacks keyed on (base positions, distance constant, player id), rebuilt every turn
+        self._cell_value_stacks = {}
+
+        # BlockStats keyed on (block width, block height)
+        self._block_stats = {}
 
-        # vectorized funcs
-        self.v_cell_value_map = np.vectorize(self.get_cell_value)
-        self.v_calc_distance = np.vectorize(self.calculate_distance)
+        # FlowFields keyed on (destinations, move_cost_type, entry_lanes)
+        self._flow_fields = {}
 
-        # init the coord map
-        for y in np.arange(self.height):
-            for x in np.arange(self.width):
-                self._coord_map[x][y] = Position(y, x)
+        # Nx5 numpy array of (owner, ship id, x, y, halite), the ships of the last frame
+        self._frame_ships = np.empty((0, 5), dtype=np.int64)
 
-        # init the dynamic maps
-        self._update_halite_map()
+        # ThreatFields keyed on player id, rebuilt every turn
+        self._threat_fields = {}
 
+        # InspirationFields keyed on player id, rebuilt every turn
+        self._inspiration_fields = {}
+
+        # (cell, turn) reservations of planned paths, see navigate() 'ship_id'
+        self.reservations = ReservationTable(self.width, self.height, RESERVATION_HORIZON)
 
     def __getitem__(self, location):
         """
@@ -131,12 +209,41 @@ class GameMap:
         :return: the contents housing that cell or entity
         """
         if isinstance(location, Position):
-            location = self.normalize(location)
-            return self._cells[location.y][location.x]
+            return self._get_cell(location.x % self.width, location.y % self.height)
         elif isinstance(location, Entity):
-            return self._cells[location.position.y][location.position.x]
+            return self._get_cell(location.position.x, location.position.y)
         return None
 
+    def _get_cell(self, x, y):
+        """
+        Get the MapCell view for a normalized x, y. Views are created on first access.
+        """
+        idx = y * self.width + x
+        cell = self._cells[idx]
+        if cell is None:
+            cell = MapCell(self, self._positions[y * self.width + x])
+            self._cells[idx] = cell
+
+        return cell
+
+    def _set_ship(self, x, y, ship):
+        """
+        Occupy a normalized x, y with ship.
+        """
+        self._ship_id_map[y, x] = ship.id
+        self._ships[ship.id] = ship
+
+    def _set_structure(self, x, y, structure):
+        """
+        Place (or remove if None) a structure at a normalized x, y.
+        """
+        if structure is None:
+            self._structure_type_map[y, x] = STRUCTURE_NONE
+            self._structures.pop((x, y), None)
+        else:
+            self._structure_type_map[y, x] = STRUCTURE_SHIPYARD if isinstance(structure, Shipyard) else STRUCTURE_DROPOFF
+            self._structures[(x, y)] = structure
+
     def calculate_distance(self, source, target, algorithm = "manhatten"):
         """
         Compute the Manhattan distance between two locations.
@@ -145,12 +252,11 @@ class GameMap:
         :param target: The target to where calculate
         :return: The distance between these items
         """
-        source = self.normalize(source)
-        target = self.normalize(target)
-        resulting_position = abs(source - target)
+        dx = abs(source.x % self.width - target.x % self.width)
+        dy = abs(source.y % self.height - target.y % self.height)
 
-        dx = min(resulting_position.x, self.width - resulting_position.x)
-        dy = min(resulting_position.y, self.height - resulting_position.y)
+        dx = min(dx, self.width - dx)
+        dy = min(dy, self.height - dy)
 
         if algorithm == "manhatten":
             retval = dx + dy
@@ -170,7 +276,18 @@ class GameMap:
         :param position: A position object.
         :return: A normalized position object fitting within the bounds of the map
         """
-        return Position(position.x % self.width, position.y % self.height)
+        return self._positions[(position.y % self.height) * self.width + position.x % self.width]
+
+    def get_position(self, x, y):
+        """
+        Get the shared normalized Position for x, y. Positions are immutable, so the same
+        instance is returned for every lookup of a cell.
+
+        :param x
+        :param y
+        :return Returns a normalized Position.
+        """
+        return self._positions[(y % self.height) * self.width + x % self.width]
 
     @staticmethod
     def _get_target_direction(source, target):
@@ -196,14 +313,15 @@ class GameMap:
         source = self.normalize(source)
         destination = self.normalize(destination)
         possible_moves = []
-        distance = Position(abs(destination.x-source.x), abs(destination.y-source.y))
+        distance_x = abs(destination.x - source.x)
+        distance_y = abs(destination.y - source.y)
         y_cardinality, x_cardinality = self._get_target_direction(source, destination)
 
-        if distance.x != 0:
-            possible_moves.append(x_cardinality if distance.x < (self.width / 2)
+        if distance_x != 0:
+            possible_moves.append(x_cardinality if distance_x < (self.width / 2)
                                   else Direction.invert(x_cardinality))
-        if distance.y != 0:
-            possible_moves.append(y_cardinality if distance.y < (self.height / 2)
+        if distance_y != 0:
+            possible_moves.append(y_cardinality if distance_y < (self.height / 2)
                                   else Direction.invert(y_cardinality))
         return possible_moves
 
@@ -231,6 +349,7 @@ class GameMap:
         :param a Start position
         :param b End position
         :move_cost_type Most cost type can be 'halite' or 'turns'
+        :max_expansions Optional, cap on A* expansions, a naive path is returned when it's hit
         """
 
         move_cost_type = args["move_cost_type"] if "move_cost_type" in args else "turns"
@@ -251,6 +370,7 @@ class GameMap:
         :current Current position
         :param b End position
         :move_cost_type Most cost type can be 'halite' or 'turns'
+        :max_expansions Optional, cap on A* expansions, a naive path is returned when it's hit
         """
 
         move_cost_type = args["move_cost_type"] if "move_cost_type" in args else None
@@ -281,10 +401,14 @@ class GameMap:
         :param start Starting Position
         :param destination Ending position
         :param algorithm:
-          'astar' - takes args: 'move_cost': 'turns'|'halite'
+          'astar' - takes args: 'move_cost': 'turns'|'halite', 'ship_id'
           'naive' - takes no args
           'dock' - takes no args
           'straightline' - takes no args
+          'flow' - takes args: 'move_cost': 'turns'|'halite', 'entry_lanes': None|'n-s', 'ship_id'
+
+        If 'ship_id' is given, start must be the ship's current position. 'astar' routes around
+        the paths other ships have reserved, and the path is reserved for the ship.
         """
         if algorithm == "astar":
             path, cost = self.get_astar_path(start, destination, args)
@@ -294,6 +418,8 @@ class GameMap:
             path, cost = self.get_docking_path(start, destination)
         elif algorithm == "straightline": # same as A* if no obstacles, 25% faster
             path, cost = self.straightline_path(start, destination)
+        elif algorithm == "flow": # no search, read from a cached flow field
+            path, cost = self.get_flow_path(start, destination, args)
         else:
             path, cost = None, None
             msg = "Unknown navigate algorithm {}".format(algorithm)
@@ -379,6 +505,7 @@ class GameMap:
         :param start Starting Position
         :param destination Dropoff position
         :move_cost_type Most cost type can be 'halite' or 'turns'
+        :max_expansions Optional, cap on A* expansions, a naive path is returned when it's hit
         :return Returns a list of positions. Positions are ordered end to start.
             returns None if no soln, returns empty list with zero cost if start == end,
             otherwise returns a path list and a cumlative cost
@@ -388,8 +515,8 @@ class GameMap:
         move_cost_type = args["move_cost_type"] if "move_cost_type" in args else None
         excludes = args["excludes"] if "excludes" in args else []
 
-        G = {} #Actual movement cost to each position from the start position
-        F = {} #Estimated movement cost of start to end going via this position
+        if move_cost_type is None:
+            raise RuntimeError("Missing required argument 'move_cost_type'".format())
 
         start = self.normalize(start)
         end = self.normalize(destination)
@@ -399,79 +526,119 @@ class GameMap:
 
         if self.DEBUG: logging.info("{} -> {}".format(start, end))
 
-        #Initialize starting values
-        G[start] = 0
-        F[start] = self.heuristic(start, start, end, {"move_cost_type": move_cost_type})
+        ship_id = args["ship_id"] if "ship_id" in args else None
+        max_expansions = args["max_expansions"] if "max_expansions" in args else None
+
+        if ship_id is None:
+            path_ids, cost = astar(self.width, self.height, start, end, move_cost_type, self._halite_map, excludes, constants.MAX_HALITE, max_expansions)
+        else:
+            reserved_expansions = RESERVATION_MAX_EXPANSIONS if max_expansions is None else min(max_expansions, RESERVATION_MAX_EXPANSIONS)
+            path_ids, cost = astar_reserved(self.width, self.height, start, end, move_cost_type, self.reservations, ship_id, self._halite_map, excludes, constants.MAX_HALITE, reserved_expansions)
+
+            # the search around reservations is bounded, past the bound plan a plain path, the
+            # conflict free part of it is still reserved
+            if path_ids is None:
+                if self.DEBUG: logging.info("A* around reservations hit max expansions {}, planning without them".format(reserved_expansions))
+                path_ids, cost = astar(self.width, self.height, start, end, move_cost_type, self._halite_map, excludes, constants.MAX_HALITE, max_expansions)
+
+        if path_ids is None:
+            if max_expansions is None:
+                return None, None
+
+            # capped search ran out of expansions, settle for a naive path
+            if self.DEBUG: logging.info("A* hit max expansions {}, using naive path".format(max_expansions))
+            path, cost = self.get_naive_path(start, end)
+
+            if ship_id is not None and path:
+                self.reserve_path(ship_id, start, path)
+
+            return path, cost
+
+        if ship_id is not None:
+            self.reservations.reserve(ship_id, path_ids[::-1], self.reservations.turn + 1)
+
+        path = [self._positions[cell_id] for cell_id in path_ids]
+
+        if self.DEBUG: logging.info("Timing - Total A* elapsed time {}".format(round(time.time() - astar_start_time, 4)))
+
+        return path, cost
+
+    def get_flow_field(self, destinations, move_cost_type = "turns", entry_lanes = None):
+        """
+        Get the flow field to the closest of destinations. Fields are built once and cached,
+        'halite' fields are rebuilt when halite changes.
 
-        closedVertices = set()
-        openVertices = set([start])
+        :param destinations Position or list of Positions, typically the bases
+        :param move_cost_type 'turns'|'halite'
+        :param entry_lanes None|'n-s'. 'n-s' == destinations, and their e/w departure lanes, can only be
+            entered from the north/south
+        :return Returns a FlowField
+        """
+        if isinstance(destinations, Position):
+            destinations = [destinations]
 
-        if self.DEBUG: logging.info("start: adding {} to openVertices".format(start))
+        destinations = [self.normalize(p) for p in destinations]
 
-        cameFrom = {}
+        key = (tuple((p.x, p.y) for p in destinations), move_cost_type, entry_lanes)
 
-        while len(openVertices) > 0:
-            #Get the vertex in the open list with the lowest F score
-            current = None
-            currentFscore = None
+        if not (key in self._flow_fields):
+            if move_cost_type == "turns":
+                step_costs = np.ones((self.height, self.width))
+            elif move_cost_type == "halite":
+                step_costs = self._halite_map * .1
+            else:
+                raise RuntimeError("Unknown move_cost_type: {}".format(move_cost_type))
 
-            for pos in openVertices:
-                if current is None or F[pos] < currentFscore:
-                    if self.DEBUG: logging.info("updating current score with F score ({}) from {}".format(F[pos], pos))
-                    currentFscore = F[pos]
-                    current = pos
+            self._flow_fields[key] = make_flow_field(self.width, self.height, destinations, step_costs, entry_lanes, DEPARTURE_DISTANCE)
 
-            #Check if we have reached the goal
-            if current == end:
-                if self.DEBUG: logging.debug("reached goal: {}".format(end))
+        return self._flow_fields[key]
 
-                #Retrace our route backward
-                path = [current]
-                while current in cameFrom:
-                    current = cameFrom[current]
-                    path.append(current)
+    def get_flow_path(self, start, destination, args = {}):
+        """
+        Get a path from a flow field.
 
-                path.pop() # remove the start point
+        :param start Starting Position
+        :param destination Position or list of Positions, the path leads to the closest
+        :param args 'move_cost_type': 'turns'|'halite', 'entry_lanes': None|'n-s'
+        :return Returns a list of positions. Positions are ordered end to start. Returns
+            None if there is no path.
+        """
+        move_cost_type = args["move_cost_type"] if "move_cost_type" in args else "turns"
+        entry_lanes = args["entry_lanes"] if "entry_lanes" in args else None
 
-                if self.DEBUG: logging.info("Timing - Total A* elapsed time {}".format(round(time.time() - astar_start_time, 4)))
+        flow_field = self.get_flow_field(destination, move_cost_type, entry_lanes)
 
-                return path, F[end] # Done!
+        path = flow_field.get_path(start)
 
-            #Mark the current vertex as closed
-            openVertices.remove(current)
-            if self.DEBUG: logging.info("removing {} from openVertices".format(current))
+        if path is None:
+            return None, None
 
-            closedVertices.add(current)
-            if self.DEBUG: logging.info("adding {} to closedVertices".format(current))
+        if "ship_id" in args:
+            self.reserve_path(args["ship_id"], start, path)
 
-            #Update scores for vertices near the current position
-            #for neighbour in graph.get_vertex_neighbours(current):
-            for neighbour in current.get_surrounding_cardinals():
-                neighbour = self.normalize(neighbour)
-                if self.DEBUG: logging.info("neighbour: {}".format(neighbour))
+        return path, flow_field.get_distance(start)
 
-                if neighbour in closedVertices:
-                    if self.DEBUG: logging.info("skipping neighbour {}, already checked".format(neighbour))
-                    continue #We have already processed this node exhaustively
+    def reserve_path(self, ship_id, start, path):
+        """
+        Reserve a path, starting next turn, for a ship. Only the continuous part of the path
+        is reserved, reservations stop at the first waypoint.
 
-                cost = sys.maxsize if neighbour in excludes else self.move_cost(current, neighbour, args)
-                candidateG = G[current] + cost
+        :param ship_id
+        :param start The ship's position
+        :param path List of positions ordered end to start, the ship's position excluded
+        :return None
+        """
+        cell_ids = []
 
-                if neighbour not in openVertices:
-                    if self.DEBUG: logging.info("Discovered a new cell {}, adding to  openVertices.".format(neighbour))
-                    openVertices.add(neighbour) #Discovered a new vertex
-                elif candidateG >= G[neighbour]:
-                    if self.DEBUG: logging.info("Ignoring candiate cell {}, cost is too high at {}".format(neighbour, round(candidateG, 4)))
-                    continue #This G score is worse than previously found
+        previous = start
+        for p in path[:-self.reservations.horizon - 1:-1]:
+            if self.calculate_distance(previous, p) != 1:
+                break
 
-                #Adopt this G score
-                cameFrom[neighbour] = current
-                G[neighbour] = candidateG
-                H = self.heuristic(start, neighbour, end, {"move_cost_type": move_cost_type})
-                F[neighbour] = G[neighbour] + H
-                if self.DEBUG: logging.info("Neighbour elapsed time {}".format(round(time.time() - astar_start_time, 4)))
+            cell_ids.append((p.y % self.height) * self.width + (p.x % self.width))
+            previous = p
 
-        return None, None
+        self.reservations.reserve(ship_id, cell_ids, self.reservations.turn + 1)
 
     def straightline_path(self, start, destination):
         """
@@ -535,6 +702,22 @@ class GameMap:
 
         return path, cost
 
+    def get_block_stats(self, w, h):
+        """
+        Get the sum, mean and max of every wxh block of halite. Stats are computed once per
+        block size and kept until halite changes.
+
+        :param w Block width
+        :param h Block height
+        :return Returns a BlockStats, arrays are indexed [y, x] on the block's top left corner.
+        """
+        key = (w, h)
+
+        if not (key in self._block_stats):
+            self._block_stats[key] = get_block_stats(self._halite_map, w, h)
+
+        return self._block_stats[key]
+
     def get_cell_blocks(self, position, w, h, blocks = None):
         """
         :param position
@@ -565,52 +748,6 @@ class GameMap:
             (Direction.West, CellBlock(self, west_corner, w, h))
         ]
 
-    def get_contiguous_area(self, p, f_threshold):
-        """
-        Get the contiguous area around p based on a threshold function
-
-        Note: Positions in the result set contain are not normalized. This is to ease
-        computation of centers.
-
-        :param p Start position
-        :return Returns a set of positions.
-        """
-        results = set()
-        closed_points = set()
-        open_points = set()
-        new = set()
-
-        #logging.debug("begining area search from {}".format(p))
-
-        open_points.add(p)
-
-        while open_points:
-            for op in open_points:
-                #logging.debug("process {} ...".format(op))
-                if op in closed_points:
-                    #logging.debug("process {} ... done. Closed".format(p))
-                    continue
-
-                results.add(op)
-
-                for a in op.get_surrounding_cardinals():
-                    if not (a in closed_points) and f_threshold(a, op):
-                        #logging.debug("{} added to new".format(a))
-                        new.add(a)
-                    else:
-                        #logging.debug("{} failed, added to closed".format(a))
-                        closed_points.add(a)
-
-                #logging.debug("process {} ... done. {} added to closed. new = {}".format(op, op, new))
-
-                closed_points.add(op)
-
-            open_points -= closed_points # remove from open_points
-            open_points |= new # add to open_points
-            new.clear()
-
-        return results
-
     @staticmethod
     def _generate():
         """
@@ -618,73 +755,115 @@ class GameMap:
         :return: The map object
         """
         map_width, map_height = map(int, read_input().split())
-        game_map = [[None for _ in range(map_width)] for _ in range(map_height)]
-        for y_position in range(map_height):
-            cells = read_input().split()
-            for x_position in range(map_width):
-                game_map[y_position][x_position] = MapCell(Position(x_position, y_position, normalize=False), int(cells[x_position]))
-        return GameMap(game_map, map_width, map_height)
+        halite_map = read_ints(map_height, map_width)
+        return GameMap(halite_map, map_width, map_height)
 
-    def _update(self):
+    def _update(self, cells = None, ships = None):
         """
         Updates this map object from the input given by the game engine
+        :param cells Nx3 numpy array of changed cells (x, y, halite) already read from the engine,
+            read from stdin if None
+        :param ships Nx5 numpy array of (owner, ship id, x, y, halite), the ships of all players
+            in the frame. Used for the threat fields, see get_threat_field()
         :return: nothing
         """
         # Mark cells as safe for navigation (will re-mark unsafe cells later)
-        for y in range(self.height):
-            for x in range(self.width):
-                self[Position(x, y)].ship = None
+        self._ship_id_map.fill(-1)
+        self._ships.clear()
 
-        for _ in range(int(read_input())):
-            cell_x, cell_y, cell_energy = map(int, read_input().split())
-            self[Position(cell_x, cell_y)].halite_amount = cell_energy
+        self._frame_ships = np.empty((0, 5), dtype=np.int64) if ships is None else np.asarray(ships, dtype=np.int64).reshape(-1, 5)
+        self._threat_fields.clear()
+        self._inspiration_fields.clear()
+        self._cell_value_stacks.clear()
 
-        self._halite_map = None
+        # apply the changed cells straight to the halite store, rows are (x, y, halite)
+        if cells is None:
+            cells = np.array([read_input().split() for _ in range(int(read_input()))], dtype=np.int32)
 
-        # invalid the cv maps at the begining of every turn
-        self._cell_value_maps.clear()
+        deltas = np.asarray(cells, dtype=np.int32).reshape(-1, 3)
 
-    def _update_halite_map(self):
-        """
-        Update the custom map halite amounts. . Typically called on every map update.
-        """
-        self._halite_map = np.empty((self.width, self.height), dtype="float32")
+        self._halite_map[deltas[:, 1], deltas[:, 0]] = deltas[:, 2]
 
-        for y in range(self.height):
-            for x in range(self.width):
-                self._halite_map[y][x] = self._cells[y][x].halite_amount
+        # invalid the cv maps when halite has changed. The cache is keyed on position and distance
+        # constant, so entries are still valid when nothing changed
+        if len(deltas):
+            self._cell_value_maps.clear()
+            self._block_stats.clear()
+
+            # 'turns' flow fields don't depend on halite
+            for key in [k for k in self._flow_fields if k[1] != "turns"]:
+                del self._flow_fields[key]
 
     def get_halite_map(self):
         """
         Get the 2d map of halite amounts.
 
-        :return Returns a WxH numpy array of halite values.
-        """
-        if self._halite_map is None:
-            self._update_halite_map()
+        Note: This is the map's halite store, not a copy. Don't modify it.
 
+        :return Returns a HxW numpy array of halite values.
+        """
         return self._halite_map
 
+    def get_ship(self, ship_id):
+        """
+        Get a ship on the map, of any player.
+
+        :param ship_id
+        :return Returns the ship, None if no cell was marked with it this turn.
+        """
+        return self._ships.get(ship_id)
+
+    def get_threat_field(self, player_id):
+        """
+        Get the enemy ships next to each cell, from player_id's point of view. Built from the
+        frame once per turn, so it isn't affected by cells marked safe/unsafe during the turn.
+
+        :param player_id
+        :return Returns a ThreatField.
+        """
+        if not (player_id in self._threat_fields):
+            self._threat_fields[player_id] = make_threat_field(self._frame_ships, player_id, self.width, self.height)
+
+        return self._threat_fields[player_id]
+
+    def get_inspiration_field(self, player_id):
+        """
+        Get the cells where a ship of player_id would be inspired. Built from the frame once
+        per turn.
+
+        :param player_id
+        :return Returns an InspirationField.
+        """
+        if not (player_id in self._inspiration_fields):
+            inspired_multiplier = (1 + constants.INSPIRED_BONUS_MULTIPLIER) * constants.EXTRACT_RATIO / constants.INSPIRED_EXTRACT_RATIO
+            self._inspiration_fields[player_id] = make_inspiration_field(self._frame_ships, player_id, self.width, self.height,
+                constants.INSPIRATION_RADIUS, constants.INSPIRATION_SHIP_COUNT, inspired_multiplier, constants.INSPIRATION_ENABLED)
+
+        return self._inspiration_fields[player_id]
+
     def get_coord_map(self):
         """
         Get a 2d map of positions. Used by other update methods.
 
-        :return Returns a WxH numpy array of Positions.
+        :return Returns a HxW numpy array of Positions, indexed [y][x].
         """
+        if self._coord_map is None:
+            self._coord_map = np.empty(self.width * self.height, dtype=object)
+            self._coord_map[:] = self._positions
+            self._coord_map = self._coord_map.reshape(self.height, self.width)
+
         return self._coord_map
 
-    def get_distance_map(self, p):
+    def get_distance_map(self, p, algorithm = "manhatten"):
         """
-        Return the 2d map of distance beteen p and all map positions. Probably
-        should build/cache one of these for each dropoff.
+        Return the 2d map of distance beteen p and all map positions. The map is a view
+        into a per map size template, so there's nothing to cache per position.
 
         param p Position
-        :return Returns WxH numpy array of distances to p.
+        :param algorithm 'manhatten'|'euclidean'
+        :return Returns a read only HxW numpy array of distances to p.
         """
-        if not (p in self._distance_maps):
-            self._distance_maps[p] = self.v_calc_distance(p, self._coord_map)
-
-        return self._distance_maps[p]
+        return get_distance_map(self.width, self.height, p, algorithm)
 
     def get_cell_value_map(self, p, distance_constant = 1):
         """
@@ -697,10 +876,31 @@ class GameMap:
         key = hash(str(p) + str(distance_constant))
 
         if not (key in self._cell_value_maps):
-            self._cell_value_maps[key] = self.v_cell_value_map(p, self._coord_map, distance_constant)
+            p = self.normalize(p)
+            self._cell_value_maps[key] = cell_value_map(self._halite_map, self.get_distance_map(p), p, distance_constant)
 
         return self._cell_value_maps[key]
 
+    def get_cell_value_stack(self, positions, distance_constant = 1, player_id = None):
+        """
+        Get the cv maps of a set of bases in one pass, with the base that owns each cell.
+
+        :param positions List of base positions
+        :param distance_constant
+        :param player_id If set, cell halite is scaled by the yield multiplier of player_id's
+            inspiration field, see get_inspiration_field()
+        :return Returns a CellValueStack.
+        """
+        positions = tuple(self.normalize(p) for p in positions)
+        key = (positions, distance_constant, player_id)
+
+        if not (key in self._cell_value_stacks):
+            distance_maps = np.stack([self.get_distance_map(p) for p in positions])
+            yield_multiplier = None if player_id is None else self.get_inspiration_field(player_id).yield_multiplier
+            self._cell_value_stacks[key] = cell_value_stack(self._halite_map, distance_maps, positions, distance_constant, yield_multiplier)
+
+        return self._cell_value_stacks[key]
+
     def get_cell_value(self, p1, p2, distance_constant = 1):
         """
         Get the value of a cell p2 given is halite amount and distance from p1.
@@ -3,16 +3,19 @@ import logging
 import sys
 import os
 import numpy as np
-from scipy.optimize import curve_fit
 
-from .common import read_input
+from .common import read_input, read_frame
 from . import constants
 from .game_map import GameMap, Player
 
 from hlt.positionals import Position
 from hlt.entity import Ship
 
-from myutils.constants import SHIP_MINING_EFFICIENCY, DEBUG, DEBUG_NONE, DEBUG_NAV_VERBOSE, LOG_DIRECTORY, MIN_MINE_RATE_DATA
+from myutils.constants import SHIP_MINING_EFFICIENCY, DEBUG, DEBUG_NONE, DEBUG_NAV_VERBOSE, LOG_DIRECTORY, MIN_MINE_RATE_DATA, MINING_RATE_DECAY, MINING_RATE_LOOKBACK, SHIP_INDEX_BUCKET_SIZE
+from myutils.metrics import MetricsStore
+from myutils.mining_rate import MiningRateEstimator
+from myutils.mining_tables import get_mining_tables
+from myutils.ship_index import ShipIndex
 
 class Game:
     """
@@ -28,28 +31,32 @@ class Game:
         # (this_ship, offending_ship, move, collision_position, resolution_function)
         self.collisions = []
 
-        # metrics
-        self.game_metrics = {
-            "burned": [],
-            "ship_count": [],
-            "gathered": [(0, 0, 5000)],
-            "loiter_distances": [],
-            "loiter_multiples": [],
-            "loiter_offsets": [],
-            "mined": [],
-            "mining_rate": [],
-            "profit": [],
-            "raw_loiter_points": [],
-            "assn_transit_duration": [],
-            "assn_explore_duration": [],
-            "assn_return_duration": [],
-            "spent": [],
-            "assn_duration": [],
-            "assn_duration2": [], # tmp. compare to assn_duration
-            "assn_point_distance": [],
-            "assn_drop_amount": [],
-            "turn_time": []
-        }
+        # metrics, columnar with running aggregates, see MetricsStore
+        self.game_metrics = MetricsStore()
+
+        I, F = np.int64, np.float64
+
+        self.game_metrics.add_metric("burned", [("turn", I), ("ship_id", I), ("halite", I)], key="ship_id")
+        self.game_metrics.add_metric("ship_count", [("turn", I), ("count", I)])
+        self.game_metrics.add_metric("gathered", [("turn", I), ("ship_id", I), ("halite", I)], key="ship_id")
+        self.game_metrics.add_metric("loiter_distances", [("turn", I), ("distance", F)])
+        self.game_metrics.add_metric("loiter_multiples", [("turn", I), ("multiple", F)])
+        self.game_metrics.add_metric("loiter_offsets", [("x", I), ("y", I)], turn=None)
+        self.game_metrics.add_metric("mined", [("turn", I), ("ship_id", I), ("halite", I)], key="ship_id", window=MINING_RATE_LOOKBACK + 1)
+        self.game_metrics.add_metric("mining_rate", [("turn", I), ("rate", F)])
+        self.game_metrics.add_metric("profit", [("turn", I), ("profit", I)])
+        self.game_metrics.add_metric("raw_loiter_points", [("x", F), ("y", F)], turn=None)
+        self.game_metrics.add_metric("assn_transit_duration", [("turn", I), ("ship_id", I), ("duration", I), ("distance", F)], value="duration")
+        self.game_metrics.add_metric("assn_explore_duration", [("turn", I), ("ship_id", I), ("duration", I), ("distance", F)], value="duration")
+        self.game_metrics.add_metric("assn_return_duration", [("turn", I), ("ship_id", I), ("duration", I)])
+        self.game_metrics.add_metric("spent", [("turn", I), ("spent", I)])
+        self.game_metrics.add_metric("assn_duration", [("turn", I), ("ship_id", I), ("duration", I)])
+        self.game_metrics.add_metric("assn_duration2", [("turn", I), ("ship_id", I), ("duration", I)]) # tmp. compare to assn_duration
+        self.game_metrics.add_metric("assn_point_distance", [("turn", I), ("ship_id", I), ("distance", I)])
+        self.game_metrics.add_metric("assn_drop_amount", [("turn", I), ("ship_id", I), ("duration", I), ("halite", I), ("distance", I), ("assignment_duration", I)], value="halite")
+        self.game_metrics.add_metric("turn_time", [("turn", I), ("time", F)])
+
+        self.game_metrics["gathered"].append((0, 0, 5000))
 
         # keyed on ship id
         self.command_queue = {}
@@ -59,6 +66,15 @@ class Game:
         # info when we calc stats such as overall mining rate
         self.ship_christenings = {}
 
+        # live ships of all players, created/survived/destroyed this turn
+        self.ship_registry = Ship.registry
+
+        # ShipEvents of the last frame
+        self.ship_events = []
+
+        # spatial index of the ships of all players in the last frame
+        self.ship_index = None
+
         # keyed on position
         self.loiter_assignments = {}
 
@@ -74,6 +90,12 @@ class Game:
         #
         self.mining_rate = False
 
+        # fit of the fleet mining rate, fed one turn at a time from game_metrics["mined"]
+        self.mining_rate_estimator = MiningRateEstimator(MINING_RATE_DECAY)
+
+        # last turn fed to the estimator
+        self._mining_rate_turn = 0
+
         # semaphore for pending dropoffs
         self.fund_dropoff = 0
 
@@ -105,6 +127,10 @@ class Game:
 
         constants.set_dimensions(self.game_map.width, self.game_map.height)
 
+        # yields, move costs and break evens for every cell halite value
+        self.mining_tables = get_mining_tables(constants.MAX_HALITE, constants.EXTRACT_RATIO, constants.MOVE_COST_RATIO,
+            constants.INSPIRED_EXTRACT_RATIO, constants.INSPIRED_BONUS_MULTIPLIER, constants.INSPIRED_MOVE_COST_RATIO)
+
     def ready(self, name):
         """
         Indicate that your bot is ready to play.
@@ -112,21 +138,31 @@ class Game:
         """
         send_commands([name])
 
-    def update_frame(self):
+    def update_frame(self, on_turn_start=None):
         """
         Updates the game object's state.
+        :param on_turn_start: Called with the turn number as soon as the engine sends the
+            turn, e.g. to start a TurnDeadline. None for no call
         :returns: nothing.
         """
-        self.turn_number = int(read_input())
+        # the whole turn is read and parsed in bulk
+        frame = read_frame(len(self.players), on_turn_start)
+
+        self.turn_number = frame.turn_number
         logging.info("=============== TURN {:03} ================".format(self.turn_number))
 
-        for _ in range(len(self.players)):
-            player, num_ships, num_dropoffs, halite = map(int, read_input().split())
-            self.players[player]._update(num_ships, num_dropoffs, halite)
+        for (player, num_ships, num_dropoffs, halite), ships, dropoffs in zip(frame.players.tolist(), frame.ships, frame.dropoffs):
+            self.players[player]._update(num_ships, num_dropoffs, halite, ships, dropoffs)
+
+        # evict ships that are gone, ships created this turn were registered by the update
+        self.ship_registry.update(self.turn_number, np.concatenate([ships[:, 0] for ships in frame.ships]))
 
         self.mining_rate = False
 
-        self.game_map._update()
+        # (owner, ship id, x, y, halite) of every ship in the frame
+        frame_ships = np.concatenate([np.column_stack((np.full(len(ships), player), ships)) for player, ships in zip(frame.players[:, 0].tolist(), frame.ships)])
+
+        self.game_map._update(frame.cells, frame_ships)
 
         # Mark cells with ships as unsafe for navigation
         for player in self.players.values():
@@ -137,32 +173,24 @@ class Game:
             for dropoff in player.get_dropoffs():
                 self.game_map[dropoff.position].structure = dropoff
 
-    def turns_to_mining_threshold(self, initial_halite, threshold):
-        """
-        Get the number of turns to reach the remaining halite threshold from initial_halite
-
-        THIS IS A HACK, should have actual func to determine turns to threshold
-        """
-        t = 1
-
-        if initial_halite <= threshold:
-            return 0
+        # spawned, destroyed, moved, mined and deposited ships of all players
+        self.ship_events = self.ship_registry.get_events(self.game_map)
 
-        remaining = initial_halite
+        self.ship_index = ShipIndex(self.ship_registry.get_table(), self.game_map.width, self.game_map.height, SHIP_INDEX_BUCKET_SIZE)
 
-        while remaining > threshold:
-            remaining = initial_halite - self.mining_value(initial_halite, t)
-            t += 1
+        # drop the reservations of ships that are gone or didn't follow their planned path
+        self.game_map.reservations.advance(self.turn_number)
+        self.game_map.reservations.validate({ship.id: ship.position.y * self.game_map.width + ship.position.x for player in self.players.values() for ship in player.get_ships()})
 
-        return t
-
-    def turns_to_mining_yield(self, initial_halite, target):
+    def turns_to_mining_threshold(self, initial_halite, threshold):
         """
-        Get the number of turns to reach yield y (halite value) from initial_halite.
+        Get the number of turns to reach the remaining halite threshold from initial_halite
 
-        E.g. how many turns until I'm getting < 100 halite per turn?
+        :param initial_halite Initial halite in the cell at the start of mining
+        :param threshold
+        :return Turns of mining until the cell has threshold halite or less.
         """
-        return 1 + math.log(float(target)/initial_halite, SHIP_MINING_EFFICIENCY)
+        return self.mining_tables.get_turns_to_threshold(initial_halite, threshold)
 
     def mining_value(self, initial_halite, t):
         """
@@ -178,7 +206,7 @@ class Game:
         '''
         Returns an overall or ship specific estimated current mining rate.
 
-        Uses curve fitting to estimate rate
+        Uses an exponential fit of past turns' rates, updated incrementally, see MiningRateEstimator
 
         Always returns a rate of at least 1.
 
@@ -209,41 +237,32 @@ class Game:
 
             return mrate
 
-        mining_rate = []
-        mined_by_turn = {}
-
-        def fexp(x, a, b , c):
-            return a * np.exp(-b * x) + c
-
-        def flinear(x, a, b):
-            return a+b*x
-
-        # mined data = (turn, ship.id, mined)
-        for turn, s_id, halite in self.game_metrics["mined"]:
-            mined_by_turn[turn] = mined_by_turn[turn] + halite if turn in mined_by_turn else halite
+        # mined data = (turn, ship.id, mined), the metric keeps per turn totals. A turn is
+        # complete once the turn is over
+        mined = self.game_metrics["mined"]
+        for t in range(self._mining_rate_turn + 1, self.turn_number):
+            if not mined.get_turn_count(t):
+                continue
 
-        # original 'mined' data is per ship
-        for t, halite in mined_by_turn.items():
-            ship_count = self.game_metrics["ship_count"][t - 1][1]
+            halite = mined.get_turn_total(t)
+            ship_count = self.game_metrics["ship_count"].get_turn_total(t)
             if ship_count == 0 and halite != 0:
                 logging.error("There is mined data for turn {}, but ship count is 0".format(t))
                 continue
 
-            mining_rate.append((t, halite / ship_count if halite else 0))
+            self.mining_rate_estimator.add(t, halite / ship_count if halite else 0)
+
+        self._mining_rate_turn = max(self._mining_rate_turn, self.turn_number - 1)
 
-        X, Y = zip(*mining_rate)
-        n = len(X) # n == the number of data points to use
+        rate = self.mining_rate_estimator.get_rate(turn)
 
-        try:
-            popt, pcov = curve_fit(fexp, X[:n], Y[:n], p0=[float(X[0]), 0.01, 1.], bounds=[0., [800., .2, 4.]])
-            rate = fexp(turn, *popt)
-        except:
-            popt, pcov = curve_fit(flinear, X[:n], Y[:n], p0=[float(X[0]), -4], bounds=[[0, -100], [800., 0.]])
-            rate = fexp(turn, *popt)
+        # only this turn has data so far
+        if rate is None:
+            rate = mined.get_turn_total(self.turn_number) / max(1, len(self.me.get_ships()))
 
-        self.mining_rate = rate
+        self.mining_rate = max(1, rate)
 
-        return max(1, rate)
+        return self.mining_rate
 
     def get_loiter_assignment(self, target):
         """
@@ -14,6 +14,9 @@ class Player:
         self._dropoffs = {}
         self.ship_count = 0
 
+        # shipyard and dropoff positions, built on first use each turn
+        self._base_positions = None
+
     def get_ship(self, ship_id):
         """
         Returns a singular ship mapped by the ship id
@@ -42,6 +45,15 @@ class Player:
         """
         return list(self._dropoffs.values())
 
+    def get_base_positions(self):
+        """
+        :return: Returns a tuple of the shipyard position and the dropoff positions
+        """
+        if self._base_positions is None:
+            self._base_positions = (self.shipyard.position,) + tuple(dropoff.position for dropoff in self._dropoffs.values())
+
+        return self._base_positions
+
     def has_ship(self, ship_id):
         """
         Check whether the player has a ship with a given ID.
@@ -64,14 +76,20 @@ class Player:
         player, shipyard_x, shipyard_y = map(int, read_input().split())
         return Player(player, Shipyard(player, -1, Position(shipyard_x, shipyard_y, normalize=False)))
 
-    def _update(self, num_ships, num_dropoffs, halite):
+    def _update(self, num_ships, num_dropoffs, halite, ships=None, dropoffs=None):
         """
         Updates this player object considering the input from the game engine for the current specific turn.
         :param num_ships: The number of ships this player has this turn
         :param num_dropoffs: The number of dropoffs this player has this turn
         :param halite: How much halite the player has in total
+        :param ships: Nx4 numpy array of (id, x, y, halite) already read from the engine, read from stdin if None
+        :param dropoffs: Nx3 numpy array of (id, x, y) already read from the engine, read from stdin if None
         :return: nothing.
         """
+        ship_rows = [None] * num_ships if ships is None else ships.tolist()
+        dropoff_rows = [None] * num_dropoffs if dropoffs is None else dropoffs.tolist()
+
         self.halite_amount = halite
-        self._ships = {id: ship for (id, ship) in [Ship._generate(self.id) for _ in range(num_ships)]}
-        self._dropoffs = {id: dropoff for (id, dropoff) in [Dropoff._generate(self.id) for _ in range(num_dropoffs)]}
+        self._ships = {id: ship for (id, ship) in [Ship._generate(self.id, values) for values in ship_rows]}
+        self._dropoffs = {id: dropoff for (id, dropoff) in [Dropoff._generate(self.id, values) for values in dropoff_rows]}
+        self._base_positions = None
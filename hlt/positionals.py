@@ -1,3 +1,5 @@
+import functools
+
 from . import commands
 from . import constants
 
@@ -86,21 +88,42 @@ class Direction:
             raise IndexError
 
 class Position:
+    """
+    A map position. Positions are immutable, so they can be shared, e.g. the normalized
+    positions from get_position_table(), and their hash is cached.
+
+    Migration notes, Positions used to be mutable:
+      - p += q and p -= q still work, they rebind p to a new normalized Position. Other
+        references to the old Position don't change.
+      - normalize() returns the normalized Position instead of normalizing in place.
+      - Assigning x or y raises AttributeError, create a new Position.
+    """
+    __slots__ = ("x", "y", "_hash")
+
     # The normalize param was not present in the early versions. Once added the default
     # was set to True. Here, a default of False is used for backwards compatibility.
     # There are instances where normalized values are not useful, e.g. when working with
     # areas that span borders. In these cases, it west to work without normalization, and
     # then normalize results if necessary.
     def __init__(self, x, y, normalize=False):
-        self.x = x
-        self.y = y
-
         if normalize:
-            self.normalize()
+            x = x % constants.WIDTH
+            y = y % constants.HEIGHT
+
+        _set_x(self, x)
+        _set_y(self, y)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Position is immutable, can't set {}".format(name))
+
+    def __reduce__(self):
+        return (Position, (self.x, self.y))
 
     def normalize(self):
-        self.x = self.x % constants.WIDTH
-        self.y = self.y % constants.HEIGHT
+        """
+        :return: Returns the position normalized to the map
+        """
+        return Position(self.x % constants.WIDTH, self.y % constants.HEIGHT)
 
     def directional_offset(self, direction):
         """
@@ -111,7 +134,7 @@ class Position:
         if isinstance(direction,  str):
             direction = DIRECTIONS[direction]
 
-        return self + Position(*direction)
+        return Position(self.x + direction[0], self.y + direction[1])
 
     def get_surrounding_cardinals(self):
         """
@@ -141,25 +164,14 @@ class Position:
         return Position(self.x - other.x, self.y - other.y)
 
     def __iadd__(self, other):
-        self.x += other.x
-        self.y += other.y
-        self.normalize()
-        return self
+        return Position(self.x + other.x, self.y + other.y, True)
 
     def __isub__(self, other):
-        self.x -= other.x
-        self.y -= other.y
-        self.normalize()
-        return self
+        return Position(self.x - other.x, self.y - other.y, True)
 
     def __mul__(self, other):
         return Position(self.x * other, self.y * other)
 
-    def __imult__(self, other):
-        self.x *= other
-        self.y *= other
-        return self
-
     def __abs__(self):
         return Position(abs(self.x), abs(self.y))
 
@@ -175,4 +187,25 @@ class Position:
                                    self.y)
 
     def __hash__(self):
-        return hash((self.x, self.y))
+        # _hash is unset until the first call
+        try:
+            return self._hash
+        except AttributeError:
+            _set_hash(self, hash((self.x, self.y)))
+            return self._hash
+
+# slot setters, they bypass Position.__setattr__
+_set_x = Position.x.__set__
+_set_y = Position.y.__set__
+_set_hash = Position._hash.__set__
+
+@functools.lru_cache(maxsize=8)
+def get_position_table(width, height):
+    """
+    Get the normalized positions of a map, one shared instance per cell.
+
+    :param width
+    :param height
+    :return Returns a tuple of Positions indexed on cell id, y * width + x.
+    """
+    return tuple(Position(x, y) for y in range(height) for x in range(width))
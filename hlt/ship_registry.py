@@ -0,0 +1,236 @@
+import numpy as np
+
+from . import constants
+
+# ship.status -> status code in ShipTable.status, unknown statuses are -1
+STATUS_CODES = {
+    "uninitialized": 0,
+    "returning": 1,
+    "exploring": 2,
+    "transiting": 3,
+    "homing": 4,
+    "tasked": 5
+}
+
+# ship event types
+EVENT_SPAWNED = "spawned"
+EVENT_DESTROYED = "destroyed"
+EVENT_MOVED = "moved"
+EVENT_MINED = "mined"
+EVENT_DEPOSITED = "deposited"
+
+class ShipEvent:
+    """
+    A change to a ship between two frames
+    :param type One of the EVENT_* types
+    :param turn_number Turn of the frame the change was seen in
+    :param ship_id
+    :param owner Player id
+    :param position Position after the change. For destroyed ships, the last seen position.
+    :param prior_position Position in the prior frame, None for spawned ships
+    :param halite Cargo after the change. For destroyed ships, the last seen cargo.
+    :param amount Halite moved by the change: fuel burned for moved, halite mined for
+        mined, halite delivered for deposited, cargo lost for destroyed, else 0
+    """
+    def __init__(self, type, turn_number, ship_id, owner, position, prior_position, halite, amount):
+        self.type = type
+        self.turn_number = turn_number
+        self.ship_id = ship_id
+        self.owner = owner
+        self.position = position
+        self.prior_position = prior_position
+        self.halite = halite
+        self.amount = amount
+
+    def __repr__(self):
+        return "{}(type={}, turn={}, ship={}, owner={}, {} -> {}, halite={}, amount={})".format(self.__class__.__name__,
+                                                       self.type,
+                                                       self.turn_number,
+                                                       self.ship_id,
+                                                       self.owner,
+                                                       self.prior_position,
+                                                       self.position,
+                                                       self.halite,
+                                                       self.amount)
+
+class ShipTable:
+    """
+    Columnar view of a set of ships, row i of every column is ships[i]
+    :param ships List of ships
+    :param ids numpy array, dtype=int
+    :param x numpy array, dtype=int
+    :param y numpy array, dtype=int
+    :param halite numpy array, dtype=int, cargo
+    :param owner numpy array, dtype=int, player id
+    :param status numpy array, dtype=int, see STATUS_CODES
+    """
+    def __init__(self, ships, ids, x, y, halite, owner, status):
+        self.ships = ships
+        self.ids = ids
+        self.x = x
+        self.y = y
+        self.halite = halite
+        self.owner = owner
+        self.status = status
+
+    def __len__(self):
+        return len(self.ships)
+
+    def select(self, mask):
+        """
+        :param mask numpy bool array or index array into the rows
+        :return Returns a new ShipTable of the selected rows.
+        """
+        rows = np.arange(len(self.ships))[mask]
+        return ShipTable([self.ships[i] for i in rows.tolist()], self.ids[rows], self.x[rows], self.y[rows], self.halite[rows], self.owner[rows], self.status[rows])
+
+def make_ship_table(ships):
+    """
+    Build a ShipTable from ships, row order is the order of ships.
+
+    :param ships List of ships
+    :return Returns a ShipTable.
+    """
+    ship_count = len(ships)
+
+    return ShipTable(
+        list(ships),
+        np.fromiter((s.id for s in ships), dtype=np.int64, count=ship_count),
+        np.fromiter((s.position.x for s in ships), dtype=np.int64, count=ship_count),
+        np.fromiter((s.position.y for s in ships), dtype=np.int64, count=ship_count),
+        np.fromiter((s.halite_amount for s in ships), dtype=np.int64, count=ship_count),
+        np.fromiter((s.owner for s in ships), dtype=np.int64, count=ship_count),
+        np.fromiter((STATUS_CODES.get(s.status, -1) for s in ships), dtype=np.int64, count=ship_count))
+
+class ShipRegistry:
+    """
+    All live ships of all players, keyed on ship id. Ship objects are kept between turns so
+    bot state attached to them survives, ships missing from a frame are evicted.
+    """
+    def __init__(self):
+        self.turn_number = 0
+
+        # keyed on ship id
+        self._ships = {}
+
+        # ship ids in the last frame
+        self._live_ids = set()
+
+        # ships in the last frame, in frame order
+        self._frame_ships = []
+
+        # (position, halite) of each ship, keyed on ship id, in the last and the prior frame
+        self._states = {}
+        self._prior_states = {}
+
+        # this turn's changes, lists of ships
+        self.created = []
+        self.survived = []
+        self.destroyed = []
+
+    def __len__(self):
+        return len(self._ships)
+
+    def __contains__(self, ship_id):
+        return ship_id in self._ships
+
+    def get(self, ship_id):
+        """
+        :return Returns the ship, None if there is no live ship with ship_id.
+        """
+        return self._ships.get(ship_id)
+
+    def add(self, ship):
+        """
+        Register a ship first seen in the current frame.
+
+        :param ship
+        :return None
+        """
+        self._ships[ship.id] = ship
+
+    def update(self, turn_number, ship_ids):
+        """
+        Close out a frame. Ships created this turn must already be registered (see add()),
+        ships that aren't in the frame are destroyed and evicted.
+
+        :param turn_number
+        :param ship_ids numpy array or list of the ids of all ships in the frame
+        :return None
+        """
+        self.turn_number = turn_number
+
+        ids = ship_ids.tolist() if isinstance(ship_ids, np.ndarray) else list(ship_ids)
+        live_ids = set(ids)
+
+        self.created = []
+        self.survived = []
+        for ship_id in ids:
+            if ship_id in self._live_ids:
+                self.survived.append(self._ships[ship_id])
+            else:
+                self.created.append(self._ships[ship_id])
+
+        self.destroyed = [self._ships.pop(ship_id) for ship_id in sorted(self._live_ids - live_ids) if ship_id in self._ships]
+
+        self._live_ids = live_ids
+        self._frame_ships = [self._ships[ship_id] for ship_id in ids]
+
+        self._prior_states = self._states
+        self._states = {ship.id: (ship.position, ship.halite_amount) for ship in self._frame_ships}
+
+    def get_prior_state(self, ship_id):
+        """
+        :return Returns the (position, halite) of a ship in the prior frame, None if the ship
+            wasn't in it.
+        """
+        return self._prior_states.get(ship_id)
+
+    def get_events(self, game_map):
+        """
+        Get the events of the last frame. Only ships that changed have events, a ship that
+        moved onto one of its owner's bases has both a moved and a deposited event.
+
+        :param game_map GameMap, updated to the last frame
+        :return Returns a list of ShipEvents.
+        """
+        events = []
+
+        for ship in self.created:
+            events.append(ShipEvent(EVENT_SPAWNED, self.turn_number, ship.id, ship.owner, ship.position, None, ship.halite_amount, 0))
+
+        for ship in self.survived:
+            prior_position, prior_halite = self._prior_states[ship.id]
+
+            if ship.position != prior_position:
+                cell = game_map[ship.position]
+                if ship.halite_amount < prior_halite and cell.has_structure and cell.structure.owner == ship.owner:
+                    # the cargo is gone, fuel is what it cost to leave the prior cell
+                    fuel_cost = min(prior_halite, game_map[prior_position].halite_amount // constants.MOVE_COST_RATIO)
+                    events.append(ShipEvent(EVENT_MOVED, self.turn_number, ship.id, ship.owner, ship.position, prior_position, ship.halite_amount, fuel_cost))
+                    events.append(ShipEvent(EVENT_DEPOSITED, self.turn_number, ship.id, ship.owner, ship.position, prior_position, ship.halite_amount, prior_halite - fuel_cost))
+                else:
+                    events.append(ShipEvent(EVENT_MOVED, self.turn_number, ship.id, ship.owner, ship.position, prior_position, ship.halite_amount, max(prior_halite - ship.halite_amount, 0)))
+            elif ship.halite_amount > prior_halite:
+                events.append(ShipEvent(EVENT_MINED, self.turn_number, ship.id, ship.owner, ship.position, prior_position, ship.halite_amount, ship.halite_amount - prior_halite))
+
+        for ship in self.destroyed:
+            prior_position, prior_halite = self._prior_states[ship.id]
+            events.append(ShipEvent(EVENT_DESTROYED, self.turn_number, ship.id, ship.owner, prior_position, prior_position, prior_halite, prior_halite))
+
+        return events
+
+    def get_ships(self):
+        """
+        :return Returns the list of live ships, in frame order.
+        """
+        return list(self._frame_ships)
+
+    def get_table(self):
+        """
+        Get the columnar view of the live ships of all players. Status is read when the table
+        is built, build a new table after changing statuses.
+
+        :return Returns a ShipTable, rows in frame order.
+        """
+        return make_ship_table(self._frame_ships)
@@ -0,0 +1,49 @@
+#
+# Ship to target assignment
+#
+# Targets used to be handed out best first in ship iteration order, so the first ship got
+# the best target whether or not it was the best ship for it. Here all ships needing a target
+# are assigned at once: a ship x target value matrix is solved for the assignment with the
+# highest total value (Hungarian method, scipy's linear_sum_assignment).
+#
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+def get_target_values(distance_maps, target_positions, target_yields, travel_cost):
+    """
+    Build the ship x target value matrix: a target's expected yield, less the cost of the
+    ship's own travel to it. Targets already claimed by another ship are left out of the
+    target sets, they aren't charged here.
+
+    :param distance_maps List of HxW numpy arrays, one per ship, distances from the ship's position
+    :param target_positions List of normalized positions
+    :param target_yields List of the expected yield of each target, travel not included
+    :param travel_cost Value of a turn of travel
+    :return Returns a len(distance_maps)xlen(target_positions) numpy array.
+    """
+    target_count = len(target_positions)
+
+    tx = np.fromiter((p.x for p in target_positions), dtype=np.int64, count=target_count)
+    ty = np.fromiter((p.y for p in target_positions), dtype=np.int64, count=target_count)
+
+    distances = np.empty((len(distance_maps), target_count))
+    for i, distance_map in enumerate(distance_maps):
+        distances[i] = distance_map[ty, tx]
+
+    return np.asarray(target_yields, dtype=np.float64) - travel_cost * distances
+
+def assign_targets(values):
+    """
+    Assign each ship at most one target and each target at most one ship, maximizing the
+    total value. With more ships than targets some ships are left without one.
+
+    :param values NxM numpy array, value of target j to ship i
+    :return Returns a dict of target indices, keyed on ship index.
+    """
+    if values.size == 0:
+        return {}
+
+    rows, cols = linear_sum_assignment(values, maximize=True)
+
+    return dict(zip(rows.tolist(), cols.tolist()))
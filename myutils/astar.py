@@ -0,0 +1,257 @@
+#
+# A* search over flat cell ids
+#
+# Cells are identified by their flat index, id = y * width + x. Neighbours come from a per
+# map size table and the open set is a binary heap, so a search only allocates Positions
+# for the final path.
+#
+
+import sys
+import heapq
+import functools
+import numpy as np
+
+from myutils.distance_maps import get_distance_map
+
+# neighbour table columns, same order as Position.get_surrounding_cardinals()
+NEIGHBOR_NORTH = 0
+NEIGHBOR_SOUTH = 1
+NEIGHBOR_EAST = 2
+NEIGHBOR_WEST = 3
+
+@functools.lru_cache(maxsize=8)
+def get_neighbor_array(width, height):
+    """
+    Get the wrap-aware cardinal neighbours of every cell.
+
+    :param width
+    :param height
+    :return Returns a read only (W*H)x4 numpy array, indexed on cell id, of (n, s, e, w) cell ids.
+    """
+    ids = np.arange(width * height).reshape(height, width)
+
+    neighbors = np.stack([
+        np.roll(ids, 1, axis=0),    # n, the cell above
+        np.roll(ids, -1, axis=0),   # s
+        np.roll(ids, -1, axis=1),   # e
+        np.roll(ids, 1, axis=1)     # w
+    ], axis=-1).reshape(-1, 4)
+
+    neighbors.flags.writeable = False
+
+    return neighbors
+
+@functools.lru_cache(maxsize=8)
+def get_neighbor_table(width, height):
+    """
+    Get the wrap-aware cardinal neighbours of every cell as plain lists, they're faster
+    than numpy arrays for per cell access.
+
+    :param width
+    :param height
+    :return Returns a list, indexed on cell id, of (n, s, e, w) cell id tuples.
+    """
+    return [tuple(row) for row in get_neighbor_array(width, height).tolist()]
+
+def _get_excluded(width, height, excludes):
+    """
+    :return Returns a bytearray, indexed on cell id, 1 == excluded.
+    """
+    excluded = bytearray(width * height)
+    if excludes:
+        for p in excludes:
+            excluded[(p.y % height) * width + (p.x % width)] = 1
+
+    return excluded
+
+def _get_costs(width, height, start, end, move_cost_type, halite_map, max_halite):
+    """
+    :return Returns a 2-tuple, the heuristic function and a list of step costs indexed on
+        cell id. Step costs are None for 'turns', every step costs 1.
+    """
+    manhatten = get_distance_map(width, height, end).ravel().tolist()
+
+    if move_cost_type == "turns":
+        dx2 = start.x - end.x
+        dy2 = start.y - end.y
+
+        def heuristic(cell_id):
+            y, x = divmod(cell_id, width)
+            return manhatten[cell_id] + abs((x - end.x) * dy2 - dx2 * (y - end.y)) * 0.001
+
+        step_costs = None
+    elif move_cost_type == "halite":
+        def heuristic(cell_id):
+            return manhatten[cell_id] * max_halite
+
+        step_costs = [h * .1 for h in halite_map.ravel().tolist()]
+    else:
+        raise RuntimeError("Unknown move_cost_type: {}".format(move_cost_type))
+
+    return heuristic, step_costs
+
+def astar(width, height, start, end, move_cost_type, halite_map = None, excludes = None, max_halite = 1000, max_expansions = None):
+    """
+    Get the cheapest path between two cells.
+
+    Costs and heuristics match GameMap.move_cost()/GameMap.heuristic(). Moving into an
+    excluded cell isn't forbidden, it costs sys.maxsize.
+
+    :param width
+    :param height
+    :param start Start Position, normalized
+    :param end End Position, normalized
+    :param move_cost_type 'turns'|'halite'
+    :param halite_map HxW numpy array of halite, required for 'halite'
+    :param excludes Iterable of normalized Positions
+    :param max_halite Heuristic cost of a 'halite' move
+    :param max_expansions Max number of nodes to expand, None for no limit
+    :return Returns a 2-tuple, a list of cell ids ordered end to start (start excluded) and
+        the cost. Returns None, None if there is no path or the search hit max_expansions.
+    """
+    cell_count = width * height
+    start_id = start.y * width + start.x
+    end_id = end.y * width + end.x
+
+    neighbors = get_neighbor_table(width, height)
+    excluded = _get_excluded(width, height, excludes)
+    heuristic, step_costs = _get_costs(width, height, start, end, move_cost_type, halite_map, max_halite)
+
+    G = [None] * cell_count
+    came_from = [-1] * cell_count
+    closed = bytearray(cell_count)
+
+    G[start_id] = 0
+    open_heap = [(heuristic(start_id), 0, start_id)]
+    counter = 1
+    expansions = 0
+
+    while open_heap:
+        f, _, current = heapq.heappop(open_heap)
+
+        if closed[current]:
+            continue
+
+        if current == end_id:
+            path = []
+            while current != start_id:
+                path.append(current)
+                current = came_from[current]
+
+            return path, f
+
+        closed[current] = 1
+
+        expansions += 1
+        if max_expansions is not None and expansions > max_expansions:
+            return None, None
+
+        step_cost = 1 if step_costs is None else step_costs[current]
+        current_g = G[current]
+
+        for neighbor in neighbors[current]:
+            if closed[neighbor]:
+                continue
+
+            candidate_g = current_g + (sys.maxsize if excluded[neighbor] else step_cost)
+
+            neighbor_g = G[neighbor]
+            if neighbor_g is not None and candidate_g >= neighbor_g:
+                continue
+
+            G[neighbor] = candidate_g
+            came_from[neighbor] = current
+            heapq.heappush(open_heap, (candidate_g + heuristic(neighbor), counter, neighbor))
+            counter += 1
+
+    return None, None
+
+def astar_reserved(width, height, start, end, move_cost_type, reservations, ship_id, halite_map = None, excludes = None, max_halite = 1000, max_expansions = None):
+    """
+    Get the cheapest path between two cells that doesn't conflict with the paths other ships
+    have reserved.
+
+    The search runs over (cell, turn) states up to the reservation horizon, over cells after
+    that. Like excluded cells, a move that conflicts with a reservation isn't forbidden, it
+    costs sys.maxsize, so there's always a path when astar() would find one.
+
+    :param width
+    :param height
+    :param start Start Position, normalized. The ship is at start on reservations.turn
+    :param end End Position, normalized
+    :param move_cost_type 'turns'|'halite'
+    :param reservations ReservationTable
+    :param ship_id Id of the planning ship, its own reservations don't conflict
+    :param halite_map HxW numpy array of halite, required for 'halite'
+    :param excludes Iterable of normalized Positions
+    :param max_halite Heuristic cost of a 'halite' move
+    :param max_expansions Max number of nodes to expand, None for no limit
+    :return Returns a 2-tuple, a list of cell ids ordered end to start (start excluded) and
+        the cost. Returns None, None if there is no path or the search hit max_expansions.
+    """
+    cell_count = width * height
+    start_id = start.y * width + start.x
+    end_id = end.y * width + end.x
+    horizon = reservations.horizon
+    turn = reservations.turn
+
+    neighbors = get_neighbor_table(width, height)
+    excluded = _get_excluded(width, height, excludes)
+    heuristic, step_costs = _get_costs(width, height, start, end, move_cost_type, halite_map, max_halite)
+
+    # state keys are t * cell_count + cell id, t is capped at the horizon, past it there
+    # are no reservations and only the cell matters
+    G = {start_id: 0}
+    came_from = {}
+    closed = set()
+
+    open_heap = [(heuristic(start_id), 0, start_id)]
+    counter = 1
+    expansions = 0
+
+    while open_heap:
+        f, _, current = heapq.heappop(open_heap)
+
+        if current in closed:
+            continue
+
+        t, cell_id = divmod(current, cell_count)
+
+        if cell_id == end_id:
+            path = []
+            while current != start_id:
+                path.append(current % cell_count)
+                current = came_from[current]
+
+            return path, f
+
+        closed.add(current)
+
+        expansions += 1
+        if max_expansions is not None and expansions > max_expansions:
+            return None, None
+
+        step_cost = 1 if step_costs is None else step_costs[cell_id]
+        current_g = G[current]
+        next_t = t + 1 if t < horizon else horizon
+
+        for neighbor in neighbors[cell_id]:
+            key = next_t * cell_count + neighbor
+            if key in closed:
+                continue
+
+            if excluded[neighbor] or (t < horizon and reservations.is_blocked(ship_id, cell_id, neighbor, turn + t)):
+                candidate_g = current_g + sys.maxsize
+            else:
+                candidate_g = current_g + step_cost
+
+            neighbor_g = G.get(key)
+            if neighbor_g is not None and candidate_g >= neighbor_g:
+                continue
+
+            G[key] = candidate_g
+            came_from[key] = current
+            heapq.heappush(open_heap, (candidate_g + heuristic(neighbor), counter, key))
+            counter += 1
+
+    return None, None
@@ -0,0 +1,52 @@
+#
+# Block statistics
+#
+# The sum, mean and max of every WxH block of the halite map, wrapping at the edges, from
+# one pass over the map. Blocks are indexed on their top left corner, so the stats of any
+# block are an array lookup. Sums come from a summed-area table of the wrap padded map, maxes
+# from a wrap mode maximum filter anchored on the block's top left corner.
+#
+
+import numpy as np
+from scipy.ndimage import maximum_filter
+
+from myutils.cell_value_map import summed_area_table, rect_sums
+
+class BlockStats:
+    """
+    Stats of the WxH blocks of a map, each array is HxW and indexed [y, x] on the block's
+    top left corner
+    :param width Block width
+    :param height Block height
+    :param sums numpy array, dtype=int
+    :param means numpy array, dtype=float
+    :param maxes numpy array, dtype=int
+    """
+    def __init__(self, width, height, sums, means, maxes):
+        self.width = width
+        self.height = height
+        self.sums = sums
+        self.means = means
+        self.maxes = maxes
+
+def get_block_stats(halite_map, width, height):
+    """
+    Get the stats of every block of a map.
+
+    :param halite_map HxW numpy array
+    :param width Block width
+    :param height Block height
+    :return Returns a BlockStats.
+    """
+    map_height, map_width = halite_map.shape
+
+    padded = np.pad(halite_map, ((0, height - 1), (0, width - 1)), mode="wrap")
+
+    rows = np.arange(map_height).reshape(-1, 1)
+    cols = np.arange(map_width).reshape(1, -1)
+    sums = rect_sums(summed_area_table(padded), rows, rows + height - 1, cols, cols + width - 1)
+
+    # the filter window is centered on the cell, shift it so the cell is the top left corner
+    maxes = maximum_filter(halite_map, size=(height, width), mode="wrap", origin=(-(height // 2), -(width // 2))).astype(np.int64)
+
+    return BlockStats(width, height, sums, sums / (width * height), maxes)
@@ -9,7 +9,8 @@ import logging
 
 class CellBlock:
     """
-    Collection of cells
+    Collection of cells. A block is a view, sum/mean/max are read from the map's per turn
+    block stats (GameMap.get_block_stats()), positions and values are only built on request.
     :param game
     :param position
     :param width
@@ -20,16 +21,32 @@ class CellBlock:
         self.w = width
         self.h = height
         self.position = position
-        self.positions = self.calc_positions(position, width, height)
-        self.cell_values = np.array([width, height])
 
-        cell_vals = [[0 for i in range(width)] for j in range(height)]
+        # normalized top left corner, indexes the block stats
+        self._corner = (position.y % game_map.height, position.x % game_map.width)
 
-        for p in self.positions:
-            cell = self.game_map[p]
-            cell_vals[p.x - position.x][p.y - position.y] = cell.halite_amount
+        self._positions = None
+        self._cell_values = None
+
+    @property
+    def positions(self):
+        if self._positions is None:
+            self._positions = self.calc_positions(self.position, self.w, self.h)
+
+        return self._positions
+
+    @property
+    def cell_values(self):
+        """
+        The block's halite, read from the map's halite store wrapping at the edges. Values
+        are indexed [x offset][y offset]
+        """
+        if self._cell_values is None:
+            rows = np.arange(self.position.y, self.position.y + self.h) % self.game_map.height
+            cols = np.arange(self.position.x, self.position.x + self.w) % self.game_map.width
+            self._cell_values = self.game_map.get_halite_map()[np.ix_(rows, cols)].T.astype(np.int64)
 
-        self.cell_values = np.array(cell_vals)
+        return self._cell_values
 
     def get_cells(self, copy = False):
         """
@@ -61,19 +78,19 @@ class CellBlock:
         """
         Return the dum of all the halite in the block of cells
         """
-        return self.cell_values.sum()
+        return self.game_map.get_block_stats(self.w, self.h).sums[self._corner]
 
     def get_mean(self):
         """
         Return the mean amout of halite in the block of cells
         """
-        return self.cell_values.mean()
+        return self.game_map.get_block_stats(self.w, self.h).means[self._corner]
 
     def get_max(self):
         """
         Return the max amount of halite in the block of cells
         """
-        return self.cell_values.max()
+        return self.game_map.get_block_stats(self.w, self.h).maxes[self._corner]
 
     def get_positions(self):
         return self.positions
@@ -0,0 +1,138 @@
+#
+# Vectorized cell value (cv) map
+#
+# GameMap.get_cell_value() scores a single cell. Calling it for every cell on the map is
+# O((W*H)^2) since each call averages the halite in the rectangle between the base and the
+# cell. The functions here compute the same values for the whole map in one pass by taking
+# the rectangle sums from a summed-area table. The maps of all bases are built together, with
+# the base that values each cell the most, see cell_value_stack().
+#
+
+import numpy as np
+
+def summed_area_table(a):
+    """
+    Get the summed-area table of a 2d array.
+
+    The table is padded with a leading row/column of zeros so that sat[r][c] is the sum of
+    a[:r, :c].
+
+    :param a HxW numpy array
+    :return Returns a (H+1)x(W+1) numpy array, dtype=int64.
+    """
+    sat = np.zeros((a.shape[0] + 1, a.shape[1] + 1), dtype=np.int64)
+    np.cumsum(a.astype(np.int64), axis=0, out=sat[1:, 1:])
+    np.cumsum(sat[1:, 1:], axis=1, out=sat[1:, 1:])
+
+    return sat
+
+def rect_sums(sat, row_start, row_end, col_start, col_end):
+    """
+    Get the sums of a set of rectangles from a summed-area table.
+
+    Bounds are inclusive and can be scalars or arrays of the same shape.
+
+    :param sat Summed-area table, see summed_area_table()
+    :return Returns a numpy array of sums.
+    """
+    return sat[row_end + 1, col_end + 1] - sat[row_start, col_end + 1] - sat[row_end + 1, col_start] + sat[row_start, col_start]
+
+class CellValueStack:
+    """
+    The cv maps of a set of bases, and which base each cell belongs to
+    :param positions Tuple of base positions, normalized
+    :param values BxHxW numpy array, values[i] is the cv map of positions[i]
+    :param owner HxW numpy array, index of the base with the highest value for the cell,
+        the first of the bases on ties
+    :param best HxW numpy array, the highest value of each cell over all bases
+    """
+    def __init__(self, positions, values, owner, best):
+        self.positions = positions
+        self.values = values
+        self.owner = owner
+        self.best = best
+
+    def get_owned_map(self, idx):
+        """
+        :param idx Base index
+        :return Returns the cv map of a base as a masked array, cells owned by other bases
+            are masked.
+        """
+        return np.ma.MaskedArray(self.values[idx], mask = self.owner != idx, fill_value = -np.inf)
+
+def cell_value_map(halite_map, distance_map, position, distance_constant = 1):
+    """
+    Get the value of every cell given its halite amount and distance from position.
+
+    Matches GameMap.get_cell_value(): the fuel cost is the distance times 10% of the mean
+    halite in the (unwrapped) rectangle spanned by position and the cell, the distance
+    constant is charged per cell of distance and values are floored at -1000.
+
+    :param halite_map HxW numpy array of halite
+    :param distance_map HxW numpy array of distances to position
+    :param position Position, normalized
+    :param distance_constant
+    :return Returns a HxW numpy array of cell values, dtype=float64.
+    """
+    return cell_value_maps(halite_map, distance_map[np.newaxis], [position], distance_constant)[0]
+
+def cell_value_maps(halite_map, distance_maps, positions, distance_constant = 1, yield_multiplier = None):
+    """
+    Get the cv maps of several positions in one pass, see cell_value_map(). The summed-area
+    table is shared, rectangle sums for all positions are a single broadcast.
+
+    :param halite_map HxW numpy array of halite
+    :param distance_maps BxHxW numpy array, distances to each position
+    :param positions List of B positions, normalized
+    :param distance_constant
+    :param yield_multiplier HxW numpy array, scales the halite a ship collects from each cell
+        (e.g. inspiration), None for no scaling. Fuel costs aren't scaled.
+    :return Returns a BxHxW numpy array of cell values, dtype=float64.
+    """
+    height, width = halite_map.shape
+
+    rows = np.arange(height).reshape(1, -1, 1)
+    cols = np.arange(width).reshape(1, 1, -1)
+
+    position_rows = np.array([p.y for p in positions]).reshape(-1, 1, 1)
+    position_cols = np.array([p.x for p in positions]).reshape(-1, 1, 1)
+
+    row_start = np.minimum(rows, position_rows)
+    row_end = np.maximum(rows, position_rows)
+    col_start = np.minimum(cols, position_cols)
+    col_end = np.maximum(cols, position_cols)
+
+    path_halite = rect_sums(summed_area_table(halite_map), row_start, row_end, col_start, col_end)
+    path_cells = (row_end - row_start + 1) * (col_end - col_start + 1)
+
+    # np.nanmean() of a float32 slice divides in float64 and rounds the result to float32,
+    # do the same so values match get_cell_value() exactly
+    path_avg_halite = (path_halite / path_cells).astype(np.float32).astype(np.float64)
+
+    distance = distance_maps.astype(np.float64)
+
+    fuel_cost = np.round(distance * path_avg_halite * .1)
+
+    halite = halite_map.astype(np.float64)
+    if yield_multiplier is not None:
+        halite = halite * yield_multiplier
+
+    return np.maximum(-1000, (halite - fuel_cost) - (distance_constant * distance))
+
+def cell_value_stack(halite_map, distance_maps, positions, distance_constant = 1, yield_multiplier = None):
+    """
+    Get the cv maps of a set of bases with the base that owns each cell.
+
+    :param halite_map HxW numpy array of halite
+    :param distance_maps BxHxW numpy array, distances to each base
+    :param positions List of B base positions, normalized
+    :param distance_constant
+    :param yield_multiplier HxW numpy array or None, see cell_value_maps()
+    :return Returns a CellValueStack.
+    """
+    values = cell_value_maps(halite_map, distance_maps, positions, distance_constant, yield_multiplier)
+
+    owner = np.argmax(values, axis=0)
+    best = np.take_along_axis(values, owner[np.newaxis], axis=0)[0]
+
+    return CellValueStack(tuple(positions), values, owner, best)
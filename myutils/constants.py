@@ -93,6 +93,11 @@ CV_MAP_THRESHOLD_DEFAULT = 0
 CV_MAP_THRESHOLD_STEP = 25
 CV_MAP_THRESHOLD_MIN = -(CV_MAP_THRESHOLD_STEP * 10)
 
+# scale cell halite in the cv maps by the inspiration yield multiplier of the cell. Off until
+# it's shown to pay: inspiration follows the enemy ships, a far cell may not be inspired when
+# a ship gets there
+CV_MAP_USE_INSPIRATION = False
+
 BLOCKED_BY_THRESHOLD_FRIENDLY = 16
 BLOCKED_BY_THRESHOLD = 4
 PROXIMITY_BLOCKED_BY_THRESHOLD = 4
@@ -136,4 +141,39 @@ DROPOFF_AREA_MIN_POSITIONS = 2
 COLLISION_AVOIDANCE_THRESHOLD_MIN = 800
 
 # Ship halite amount at which friendly ship will not avoid enemy ships/ crash is ok if they have x more cargo
-COLLISION_AVOIDANCE_EXCHANGE_RATIO = 4
\ No newline at end of file
+COLLISION_AVOIDANCE_EXCHANGE_RATIO = 4
+
+# how many turns ahead planned paths are reserved. Ships planning later route around the
+# reservations of ships that planned earlier
+RESERVATION_HORIZON = 8
+
+# max number of nodes a search around reservations expands, it searches (cell, turn) states
+# and can cost several plain A* searches. Past the cap the path is planned without them
+RESERVATION_MAX_EXPANSIONS = 1000
+
+# bucket size (cells) of the ship spatial index, about the radius of the usual queries
+SHIP_INDEX_BUCKET_SIZE = 8
+
+# ships within this distance of an SOS are considered for a response
+SOS_RESPONSE_RADIUS = 8
+
+# time (s) a turn may take, the engine allows 2s. The rest is margin for reading the frame
+# and sending commands
+TURN_TIME_BUDGET = 1.5
+
+# time (s) that must be left in the turn to run the full version of an expensive phase,
+# with less the phase degrades to a cheaper version. See TurnDeadline.degrade()
+DEADLINE_RESERVES = {
+    "cv_map": 1.1,          # reuse last turn's cv map
+    "dropoff_area": 0.9,    # keep last turn's dropoff area
+    "astar": 0.6,           # cap A* expansions, fall back to naive paths
+    "ship_move": 0.2,       # remaining ships stay still
+    "collisions": 0.1       # colliding ships stay still instead of calling their resolver
+}
+
+# max number of nodes a degraded A* search expands before it falls back to a naive path
+DEADLINE_ASTAR_MAX_EXPANSIONS = 250
+
+# weight of a turn's mining rate relative to the next turn's when fitting the mining rate
+# decay. Lower follows recent turns more closely
+MINING_RATE_DECAY = .97
@@ -0,0 +1,116 @@
+#
+# Turn deadline
+#
+# The engine kills a bot that takes too long on a turn. Phases of the turn are timed, and
+# before an expensive phase runs it checks what's left of the turn budget. When too little
+# is left the phase degrades to a cheaper version, so a command list is always sent in time.
+#
+
+import time
+import logging
+
+from myutils.constants import DEBUG, DEBUG_TIMING
+
+class TurnDeadline:
+    """
+    Time budget of a turn
+    :param budget Time (s) a turn may take
+    :param reserves Dict of the time (s) that must be left to run the full version of a
+        phase, keyed on degradation name
+    :param clock Function returning the current time (s)
+    """
+    def __init__(self, budget, reserves, clock = time.time):
+        self.budget = budget
+        self.reserves = reserves
+        self.clock = clock
+
+        self.turn_number = 0
+        self.start_time = clock()
+
+        # keyed on phase name, elapsed time (s) this turn
+        self.phase_times = {}
+
+        # keyed on degradation name, number of times it fired this turn
+        self.degradations = {}
+
+        self._phase = None
+        self._phase_start_time = None
+
+    def start(self, turn_number):
+        """
+        Start the clock for a turn. Call as soon as the engine sends the turn, before the
+        frame is parsed, the engine's clock is already running.
+
+        :param turn_number
+        :return None
+        """
+        self.turn_number = turn_number
+        self.start_time = self.clock()
+        self.phase_times = {}
+        self.degradations = {}
+        self._phase = None
+
+    def elapsed(self):
+        """
+        :return Returns the time (s) since the turn started.
+        """
+        return self.clock() - self.start_time
+
+    def remaining(self):
+        """
+        :return Returns the time (s) left in the turn budget, negative once it's exceeded.
+        """
+        return self.budget - self.elapsed()
+
+    def start_phase(self, name):
+        """
+        Start timing a phase, ends the current phase. Time spent in a phase that's started
+        more than once (e.g. once per base) is summed.
+
+        :param name
+        :return None
+        """
+        self.end_phase()
+
+        self._phase = name
+        self._phase_start_time = self.clock()
+
+    def end_phase(self):
+        """
+        Stop timing the current phase.
+
+        :return None
+        """
+        if self._phase is None:
+            return
+
+        self.phase_times[self._phase] = self.phase_times.get(self._phase, 0) + self.clock() - self._phase_start_time
+        self._phase = None
+
+    def degrade(self, name):
+        """
+        Should a phase run its cheaper version?
+
+        :param name Degradation name, a key of reserves
+        :return Returns True, and records the degradation, if less than the phase's reserve
+            is left.
+        """
+        if self.remaining() >= self.reserves[name]:
+            return False
+
+        self.degradations[name] = self.degradations.get(name, 0) + 1
+
+        return True
+
+    def log(self):
+        """
+        Log this turn's degradations, and the phase times if timing is being debugged.
+
+        :return None
+        """
+        self.end_phase()
+
+        if self.degradations:
+            logging.warning("Time - Turn {} degraded at {}s: {}".format(self.turn_number, round(self.elapsed(), 3), ", ".join("{} x{}".format(name, count) for name, count in self.degradations.items())))
+
+        if DEBUG & (DEBUG_TIMING): logging.info("Time - Phase times: {}".format(", ".join("{}: {}".format(name, round(t, 4)) for name, t in self.phase_times.items())))
@@ -0,0 +1,107 @@
+#
+# Toroidal distance maps
+#
+# The distance from a position to every cell only depends on the offset between them, so
+# one template per map size and algorithm covers every origin. The distance map for an
+# origin is a window into the template tiled 2x2, no per cell work is needed.
+#
+
+import functools
+import numpy as np
+
+# map sizes * algorithms. A game only ever uses one map size
+DISTANCE_TEMPLATE_CACHE_SIZE = 8
+
+@functools.lru_cache(maxsize=DISTANCE_TEMPLATE_CACHE_SIZE)
+def get_distance_template(width, height, algorithm = "manhatten"):
+    """
+    Get the distances from (0, 0) to every cell, tiled 2x2.
+
+    :param width
+    :param height
+    :param algorithm 'manhatten'|'euclidean'
+    :return Returns a read only (2*H)x(2*W) numpy array of distances.
+    """
+    dy = np.arange(height).reshape(-1, 1)
+    dx = np.arange(width).reshape(1, -1)
+
+    dy = np.minimum(dy, height - dy)
+    dx = np.minimum(dx, width - dx)
+
+    if algorithm == "manhatten":
+        template = dy + dx
+    elif algorithm == "euclidean":
+        template = np.sqrt(dx * dx + dy * dy)
+    else:
+        raise RuntimeError("Unknown distance algorithm: {}".format(algorithm))
+
+    template = np.tile(template, (2, 2))
+    template.flags.writeable = False
+
+    return template
+
+def get_distance_map(width, height, position, algorithm = "manhatten"):
+    """
+    Get the distances from position to every cell.
+
+    :param width
+    :param height
+    :param position Position
+    :param algorithm 'manhatten'|'euclidean'
+    :return Returns a read only HxW view of the distance template.
+    """
+    template = get_distance_template(width, height, algorithm)
+
+    row = height - position.y % height
+    col = width - position.x % width
+
+    return template[row:row + height, col:col + width]
+
+class NearestBases:
+    """
+    The closest base of every cell
+    :param positions Tuple of base positions
+    :param index HxW numpy array, index into positions of the closest base, the first of the
+        bases on ties
+    :param distance HxW numpy array, distance to the closest base
+    """
+    def __init__(self, positions, index, distance):
+        self.positions = positions
+        self.index = index
+        self.distance = distance
+
+    def get_base(self, position):
+        """
+        :return Returns the position of the base closest to position.
+        """
+        height, width = self.index.shape
+        return self.positions[self.index[position.y % height, position.x % width]]
+
+    def get_distance(self, position):
+        """
+        :return Returns the distance from position to its closest base.
+        """
+        height, width = self.distance.shape
+        return int(self.distance[position.y % height, position.x % width])
+
+# one entry per set of bases, the set only changes when a dropoff is built
+@functools.lru_cache(maxsize=4)
+def get_nearest_bases(width, height, positions, algorithm = "manhatten"):
+    """
+    Get the closest base of every cell (a Voronoi map of the bases).
+
+    :param width
+    :param height
+    :param positions Tuple of base positions
+    :param algorithm 'manhatten'|'euclidean'
+    :return Returns a NearestBases.
+    """
+    distances = np.stack([get_distance_map(width, height, p, algorithm) for p in positions])
+
+    index = np.argmin(distances, axis=0)
+    distance = np.take_along_axis(distances, index[np.newaxis], axis=0)[0]
+
+    index.flags.writeable = False
+    distance.flags.writeable = False
+
+    return NearestBases(positions, index, distance)
@@ -0,0 +1,139 @@
+#
+# Flow fields
+#
+# A flow field holds, for every cell, the cost to the closest of a set of destinations
+# (typically the bases) and the next cell on the way there. It takes one Dijkstra pass to
+# build, after that any number of ships can read their path home without a search.
+#
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from hlt.positionals import get_position_table
+
+from myutils.astar import get_neighbor_array, NEIGHBOR_NORTH, NEIGHBOR_SOUTH, NEIGHBOR_EAST, NEIGHBOR_WEST
+
+# when more than one neighbour is on a shortest path, prefer e/w moves then n/s moves. This
+# aligns with the destination column first, like GameMap.get_naive_path()
+NEXT_HOP_PREFERENCE = [NEIGHBOR_EAST, NEIGHBOR_WEST, NEIGHBOR_NORTH, NEIGHBOR_SOUTH]
+
+# cost used for free moves (e.g. off an empty cell). Every next hop must be strictly closer
+# to a destination, otherwise next hops can cycle across a run of empty cells
+MIN_STEP_COST = 1e-6
+
+class FlowField:
+    """
+    Cost and next hop to the closest destination for every cell
+    :param width
+    :param height
+    :param destinations List of Positions
+    :param distance HxW numpy array of costs, inf if unreachable
+    :param next_hop HxW numpy array of cell ids, -1 at destinations and unreachable cells
+    :param source HxW numpy array of indices into destinations
+    """
+    def __init__(self, width, height, destinations, distance, next_hop, source):
+        self.width = width
+        self.height = height
+        self.destinations = destinations
+        self.distance = distance
+        self.next_hop = next_hop
+        self.source = source
+
+        # plain list for walking paths
+        self._next_hop_list = next_hop.ravel().tolist()
+
+    def get_distance(self, position):
+        """
+        :return Returns the cost from position to the closest destination.
+        """
+        return self.distance[position.y % self.height, position.x % self.width]
+
+    def get_destination(self, position):
+        """
+        :return Returns the destination Position closest to position, None if unreachable.
+        """
+        idx = self.source[position.y % self.height, position.x % self.width]
+        return None if idx < 0 else self.destinations[idx]
+
+    def get_path(self, position):
+        """
+        Get the path from position to the closest destination.
+
+        :param position Start position
+        :return Returns a list of positions ordered end to start, the start position is
+            excluded. Returns None if there is no path.
+        """
+        cell_id = (position.y % self.height) * self.width + position.x % self.width
+
+        if self.source.flat[cell_id] < 0:
+            return None
+
+        positions = get_position_table(self.width, self.height)
+
+        path = []
+        next_hop = self._next_hop_list[cell_id]
+        while next_hop != -1:
+            path.append(positions[next_hop])
+            next_hop = self._next_hop_list[next_hop]
+
+        path.reverse()
+
+        return path
+
+def make_flow_field(width, height, destinations, step_costs, entry_lanes = None, lane_length = 0):
+    """
+    Build a flow field to the closest of destinations.
+
+    :param width
+    :param height
+    :param destinations List of normalized Positions
+    :param step_costs HxW numpy array, the cost of moving off each cell
+    :param entry_lanes None|'n-s'. 'n-s' only allows destinations to be entered from the
+        north/south, the e/w cells are departure lanes.
+    :param lane_length With 'n-s' entry lanes, the number of cells e/w of a destination that
+        are departure lane. They can be left, but not entered, moving e/w.
+    :return Returns a FlowField.
+    """
+    cell_count = width * height
+    neighbors = get_neighbor_array(width, height)
+    destination_ids = [p.y * width + p.x for p in destinations]
+
+    # blocked[v, k] == True, the move from v to its k neighbour isn't allowed
+    blocked = np.zeros((cell_count, 4), dtype=bool)
+    if entry_lanes == "n-s":
+        for cell_id in destination_ids:
+            east_id = west_id = cell_id
+            for _ in range(lane_length + 1):
+                blocked[neighbors[east_id, NEIGHBOR_EAST], NEIGHBOR_WEST] = True
+                blocked[neighbors[west_id, NEIGHBOR_WEST], NEIGHBOR_EAST] = True
+                east_id = neighbors[east_id, NEIGHBOR_EAST]
+                west_id = neighbors[west_id, NEIGHBOR_WEST]
+    elif entry_lanes is not None:
+        raise RuntimeError("Unknown entry_lanes: {}".format(entry_lanes))
+
+    # search from the destinations over reversed edges, the edge neighbour -> v costs
+    # what it costs to move off v
+    costs = np.asarray(step_costs, dtype=np.float64).ravel()
+    costs = np.where(costs > 0, costs, MIN_STEP_COST)
+    v_ids, k_ids = np.nonzero(~blocked)
+    graph = csr_matrix((costs[v_ids], (neighbors[v_ids, k_ids], v_ids)), shape=(cell_count, cell_count))
+
+    distance, _, sources = dijkstra(graph, indices=destination_ids, min_only=True, return_predecessors=True)
+
+    # next hop is the allowed neighbour closest to a destination
+    neighbor_distance = distance[neighbors]
+    neighbor_distance[blocked] = np.inf
+    preferred = np.asarray(NEXT_HOP_PREFERENCE)
+    choice = preferred[np.argmin(neighbor_distance[:, preferred], axis=1)]
+    next_hop = neighbors[np.arange(cell_count), choice]
+
+    unreachable = sources < 0
+    next_hop[unreachable] = -1
+    next_hop[destination_ids] = -1
+
+    source_index = np.full(cell_count, -1, dtype=np.int64)
+    for idx, cell_id in enumerate(destination_ids):
+        source_index[sources == cell_id] = idx
+
+    return FlowField(width, height, destinations, distance.reshape(height, width), next_hop.reshape(height, width), source_index.reshape(height, width))
@@ -0,0 +1,42 @@
+#
+# Hotspot selection
+#
+# The best k cells of a value map (e.g. a cv map) in a single pass: np.argpartition finds the
+# k highest values among the allowed cells in O(W*H), only those k are sorted.
+#
+
+import numpy as np
+
+def get_top_cells(values, k, exclude = None, min_value = -np.inf):
+    """
+    Get the k highest value cells of a map.
+
+    :param values HxW numpy array or masked array, masked cells are never selected
+    :param k Max number of cells
+    :param exclude HxW numpy bool array, True for cells that can't be selected (e.g. cells
+        already assigned), None to allow all cells
+    :param min_value Only cells with a value > min_value are selected
+    :return Returns a 3-tuple of numpy arrays (y, x, value) of at most k cells, highest
+        value first.
+    """
+    width = values.shape[1]
+
+    flat = np.ma.getdata(values).ravel()
+
+    allowed = flat > min_value
+    allowed &= ~np.ma.getmaskarray(values).ravel()
+    if exclude is not None:
+        allowed &= ~exclude.ravel()
+
+    candidates = np.flatnonzero(allowed)
+
+    if k <= 0:
+        candidates = candidates[:0]
+    elif len(candidates) > k:
+        candidates = candidates[np.argpartition(flat[candidates], -k)[-k:]]
+
+    candidates = candidates[np.argsort(-flat[candidates], kind="stable")]
+
+    y, x = np.divmod(candidates, width)
+
+    return y, x, flat[candidates]
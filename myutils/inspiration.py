@@ -0,0 +1,75 @@
+#
+# Inspiration field
+#
+# A ship is inspired when at least INSPIRATION_SHIP_COUNT enemy ships are within
+# INSPIRATION_RADIUS (Manhattan) of it. An inspired ship mines 1/INSPIRED_EXTRACT_RATIO of the
+# cell and collects INSPIRED_BONUS_MULTIPLIER times that on top. The enemy count for every
+# cell is one wrap mode convolution of the enemy ship positions with a diamond kernel.
+#
+
+import functools
+import numpy as np
+from scipy.ndimage import convolve
+
+class InspirationField:
+    """
+    Inspiration of each cell from one player's point of view. Arrays are HxW, indexed [y, x]
+    :param player_id The player the ships are enemies of
+    :param counts numpy array, number of enemy ships within the inspiration radius
+    :param inspired numpy bool array, would a ship on the cell be inspired
+    :param yield_multiplier numpy array, halite collected per turn relative to an uninspired
+        ship, 1 for cells that aren't inspired
+    """
+    def __init__(self, player_id, counts, inspired, yield_multiplier):
+        self.player_id = player_id
+        self.counts = counts
+        self.inspired = inspired
+        self.yield_multiplier = yield_multiplier
+
+    def is_inspired(self, position):
+        """
+        :param position Normalized position
+        :return Returns True if a ship at position is inspired.
+        """
+        return bool(self.inspired[position.y, position.x])
+
+@functools.lru_cache(maxsize=8)
+def diamond_kernel(radius):
+    """
+    :return Returns a (2r+1)x(2r+1) numpy array, 1 for offsets within Manhattan distance r.
+    """
+    offsets = np.abs(np.arange(-radius, radius + 1))
+    kernel = (offsets.reshape(-1, 1) + offsets.reshape(1, -1) <= radius).astype(np.int16)
+    kernel.flags.writeable = False
+
+    return kernel
+
+def make_inspiration_field(ships, player_id, width, height, radius, ship_count, inspired_multiplier, enabled = True):
+    """
+    Build the inspiration field of a player.
+
+    :param ships Nx5 numpy array of (owner, ship id, x, y, halite), the ships of all players
+    :param player_id
+    :param width
+    :param height
+    :param radius Inspiration radius
+    :param ship_count Enemy ships needed within radius for inspiration
+    :param inspired_multiplier Yield of an inspired ship relative to an uninspired ship
+    :param enabled False if inspiration is disabled, no cell is inspired
+    :return Returns an InspirationField.
+    """
+    enemies = ships[ships[:, 0] != player_id]
+
+    occupancy = np.zeros((height, width), dtype=np.int16)
+    np.add.at(occupancy, (enemies[:, 3], enemies[:, 2]), 1)
+
+    counts = convolve(occupancy, diamond_kernel(radius), mode="wrap")
+
+    if enabled:
+        inspired = counts >= ship_count
+    else:
+        inspired = np.zeros((height, width), dtype=bool)
+
+    yield_multiplier = np.where(inspired, inspired_multiplier, 1.0)
+
+    return InspirationField(player_id, counts, inspired, yield_multiplier)
@@ -0,0 +1,199 @@
+#
+# Game metrics
+#
+# Each metric is an append only table with a typed numpy array per column. Aggregates are
+# kept up to date as rows are appended: value total/min/max, per turn totals, per key
+# totals and per key totals over a trailing window of turns (a ring buffer of turns), so
+# per turn reporting doesn't rescan the metric's history.
+#
+
+import numpy as np
+
+# initial number of rows/turns allocated, arrays double when full
+METRIC_INITIAL_CAPACITY = 256
+
+class Metric:
+    """
+    One metric
+    :param columns List of (name, dtype) tuples
+    :param value Name of the value column, aggregates are over it. Default is the last column.
+    :param turn Name of the turn column, None if rows aren't per turn
+    :param key Name of the key column (e.g. ship id) for per key totals, None for no key totals
+    :param window Number of trailing turns kept for per key window totals, 0 for none. Needs
+        a turn column
+    """
+    def __init__(self, columns, value = None, turn = "turn", key = None, window = 0):
+        if window and not turn:
+            raise RuntimeError("Metric window totals need a turn column")
+
+        self.names = [name for name, _ in columns]
+        self._columns = [np.empty(METRIC_INITIAL_CAPACITY, dtype=dtype) for _, dtype in columns]
+        self._count = 0
+
+        self._value_idx = self.names.index(value) if value else len(columns) - 1
+        self._turn_idx = self.names.index(turn) if turn else None
+        self._key_idx = self.names.index(key) if key else None
+
+        self.total = 0
+        self.min_row = None
+        self.max_row = None
+
+        # value total and row count by turn, indexed on turn
+        self._turn_totals = np.zeros(METRIC_INITIAL_CAPACITY)
+        self._turn_counts = np.zeros(METRIC_INITIAL_CAPACITY, dtype=np.int64)
+
+        # keyed on key, value total
+        self.key_totals = {}
+
+        # ring of the last window turns, slot turn % window holds the per key totals of a turn
+        self.window = window
+        self._window_turns = [-1] * window
+        self._window_totals = [{} for _ in range(window)]
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, idx):
+        """
+        :return Returns a row as a tuple, or a list of rows for a slice.
+        """
+        if isinstance(idx, slice):
+            return [self._get_row(i) for i in range(*idx.indices(self._count))]
+
+        if idx < 0:
+            idx += self._count
+
+        if idx < 0 or idx >= self._count:
+            raise IndexError("Metric row {} out of range".format(idx))
+
+        return self._get_row(idx)
+
+    def __iter__(self):
+        return (self._get_row(i) for i in range(self._count))
+
+    def __repr__(self):
+        return "{}(columns={}, rows={}, total={})".format(self.__class__.__name__, self.names, self._count, self.total)
+
+    def append(self, row):
+        """
+        Append a row and update the aggregates.
+
+        :param row Tuple of column values, in column order
+        :return None
+        """
+        if self._count == len(self._columns[0]):
+            self._columns = [np.resize(column, 2 * len(column)) for column in self._columns]
+
+        for column, value in zip(self._columns, row):
+            column[self._count] = value
+
+        self._count += 1
+
+        value = row[self._value_idx]
+
+        self.total += value
+
+        if self.min_row is None or value < self.min_row[self._value_idx]:
+            self.min_row = tuple(row)
+
+        if self.max_row is None or value > self.max_row[self._value_idx]:
+            self.max_row = tuple(row)
+
+        if self._turn_idx is not None:
+            turn = int(row[self._turn_idx])
+
+            if turn >= len(self._turn_totals):
+                size = max(turn + 1, 2 * len(self._turn_totals))
+                self._turn_totals = np.concatenate((self._turn_totals, np.zeros(size - len(self._turn_totals))))
+                self._turn_counts = np.concatenate((self._turn_counts, np.zeros(size - len(self._turn_counts), dtype=np.int64)))
+
+            self._turn_totals[turn] += value
+            self._turn_counts[turn] += 1
+
+        if self._key_idx is not None:
+            key = row[self._key_idx]
+            self.key_totals[key] = self.key_totals.get(key, 0) + value
+
+            if self.window:
+                slot = turn % self.window
+                if self._window_turns[slot] != turn:
+                    self._window_turns[slot] = turn
+                    self._window_totals[slot] = {}
+
+                totals = self._window_totals[slot]
+                totals[key] = totals.get(key, 0) + value
+
+    def get_mean(self, name = None):
+        """
+        :param name Column name, default is the value column
+        :return Returns the mean of a column, None if there are no rows.
+        """
+        if not self._count:
+            return None
+
+        if name is None:
+            return self.total / self._count
+
+        return float(np.mean(self.get_column(name)))
+
+    def get_column(self, name):
+        """
+        :return Returns a read only view of a column.
+        """
+        column = self._columns[self.names.index(name)][:self._count]
+        column.flags.writeable = False
+        return column
+
+    def get_turn_total(self, turn):
+        """
+        :return Returns the value total of a turn.
+        """
+        return self._turn_totals[turn].item() if 0 <= turn < len(self._turn_totals) else 0
+
+    def get_turn_count(self, turn):
+        """
+        :return Returns the number of rows of a turn.
+        """
+        return int(self._turn_counts[turn]) if 0 <= turn < len(self._turn_counts) else 0
+
+    def get_window_total(self, first_turn, last_turn):
+        """
+        :return Returns the value total of turns first_turn..last_turn, inclusive.
+        """
+        first_turn = max(first_turn, 0)
+        last_turn = min(last_turn, len(self._turn_totals) - 1)
+
+        return self._turn_totals[first_turn:last_turn + 1].sum().item() if first_turn <= last_turn else 0
+
+    def get_window_key_totals(self, first_turn):
+        """
+        Get the per key value totals from first_turn on. Only the last window turns are kept,
+        earlier turns aren't included.
+
+        :param first_turn
+        :return Returns a dict of value totals, keyed on key.
+        """
+        key_totals = {}
+
+        for turn, totals in zip(self._window_turns, self._window_totals):
+            if turn >= first_turn:
+                for key, value in totals.items():
+                    key_totals[key] = key_totals.get(key, 0) + value
+
+        return key_totals
+
+    def _get_row(self, idx):
+        return tuple(column[idx].item() for column in self._columns)
+
+class MetricsStore(dict):
+    """
+    Metrics, keyed on metric name
+    """
+    def add_metric(self, name, columns, value = None, turn = "turn", key = None, window = 0):
+        """
+        Add a metric, see Metric for the params.
+
+        :return Returns the Metric.
+        """
+        self[name] = Metric(columns, value, turn, key, window)
+        return self[name]
@@ -0,0 +1,98 @@
+#
+# Mining rate estimation
+#
+# The fleet mining rate decays over the game as the map is mined out. Rates are fit to an
+# exponential, log(rate) = a + b * turn, by recursive least squares. Each turn adds one
+# point to running sums, older turns are down weighted so the fit follows the current
+# decay.
+#
+
+import math
+
+class MiningRateEstimator:
+    """
+    Exponentially weighted least squares fit of log(mining rate) over turns
+    :param decay Weight of a point relative to the point one turn newer, 0 < decay <= 1
+    :param min_slope Lower bound of b, the steepest decay allowed
+    :param max_slope Upper bound of b
+    """
+    def __init__(self, decay, min_slope = -0.2, max_slope = 0.0):
+        self.decay = decay
+        self.min_slope = min_slope
+        self.max_slope = max_slope
+
+        self.count = 0
+        self.last_turn = None
+
+        # weighted sums of 1, t, t^2, log(rate) and t * log(rate)
+        self._w = 0.0
+        self._t = 0.0
+        self._tt = 0.0
+        self._y = 0.0
+        self._ty = 0.0
+
+    def add(self, turn, rate):
+        """
+        Add a turn's rate. Turns must be added in increasing order, rates <= 0 are skipped.
+
+        :param turn
+        :param rate Mined halite per ship
+        :return None
+        """
+        if rate <= 0:
+            return
+
+        # age the existing points by the number of turns since the last point
+        if self.last_turn is not None:
+            weight = self.decay ** (turn - self.last_turn)
+            self._w *= weight
+            self._t *= weight
+            self._tt *= weight
+            self._y *= weight
+            self._ty *= weight
+
+        y = math.log(rate)
+
+        self._w += 1
+        self._t += turn
+        self._tt += turn * turn
+        self._y += y
+        self._ty += turn * y
+
+        self.count += 1
+        self.last_turn = turn
+
+    def get_coefficients(self):
+        """
+        :return Returns a 2-tuple (a, b), log(rate) = a + b * turn. Returns None if no
+            rates have been added.
+        """
+        if self.count == 0:
+            return None
+
+        mean_t = self._t / self._w
+        mean_y = self._y / self._w
+        var_t = self._tt / self._w - mean_t * mean_t
+
+        # a single turn (or turns too close to tell apart) has no trend
+        if var_t <= 1e-9:
+            slope = 0.0
+        else:
+            slope = (self._ty / self._w - mean_t * mean_y) / var_t
+
+        slope = min(self.max_slope, max(self.min_slope, slope))
+
+        return mean_y - slope * mean_t, slope
+
+    def get_rate(self, turn):
+        """
+        :return Returns the estimated mining rate at turn, None if no rates have been added.
+        """
+        coefficients = self.get_coefficients()
+
+        if coefficients is None:
+            return None
+
+        a, b = coefficients
+
+        return math.exp(a + b * turn)
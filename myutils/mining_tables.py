@@ -0,0 +1,103 @@
+#
+# Mining economics tables
+#
+# Yield, move cost and turns-to-threshold for every cell halite value 0..MAX_HALITE,
+# following the engine's rounding: mining takes ceil(halite / EXTRACT_RATIO), moving costs
+# floor(halite / MOVE_COST_RATIO), inspired ships use the INSPIRED_* ratios. Built once from the game constants, after that economic
+# decisions are array lookups and fleet-wide decisions are a single gather.
+#
+
+import functools
+import numpy as np
+
+class MiningTables:
+    """
+    Mining economics per cell halite value, every array is indexed on halite 0..max_halite
+    :param max_halite
+    :param extract_ratio
+    :param yields numpy array, halite a ship mines in one turn
+    :param inspired_yields numpy array, halite an inspired ship collects in one turn, bonus included
+    :param move_costs numpy array, halite it costs to move off the cell
+    :param inspired_move_costs numpy array, move cost for an inspired ship
+    :param turns_to_threshold (max_halite + 1)x(max_halite + 1) numpy array, indexed
+        [halite, threshold], turns of mining until the cell has threshold halite or less
+    :param break_even_rates numpy array, the fleet mining rate above which moving on pays
+        more than mining the cell, see net_mine/net_move in utils.move_ok()
+    :param inspired_break_even_rates numpy array, break even rates for an inspired ship
+    """
+    def __init__(self, max_halite, extract_ratio, yields, inspired_yields, move_costs, inspired_move_costs, turns_to_threshold, break_even_rates, inspired_break_even_rates):
+        self.max_halite = max_halite
+        self.extract_ratio = extract_ratio
+        self.yields = yields
+        self.inspired_yields = inspired_yields
+        self.move_costs = move_costs
+        self.inspired_move_costs = inspired_move_costs
+        self.turns_to_threshold = turns_to_threshold
+        self.break_even_rates = break_even_rates
+        self.inspired_break_even_rates = inspired_break_even_rates
+
+    def get_turns_to_threshold(self, halite, threshold):
+        """
+        :return Returns the turns of mining until a cell with halite has threshold or less.
+        """
+        return int(self.turns_to_threshold[self._clip(halite), self._clip(threshold)])
+
+    def should_move(self, halite, mining_rate, inspired = False):
+        """
+        Does moving on pay more than mining? Works for a single value or an array of cell
+        halite, e.g. the cells of the whole fleet.
+
+        :param halite Cell halite, int or numpy array
+        :param mining_rate Fleet mining rate
+        :param inspired Is the ship inspired, bool or a bool array matching halite
+        :return Returns a bool, or a bool array
+        """
+        if isinstance(halite, np.ndarray):
+            halite = np.clip(halite, 0, self.max_halite)
+            return np.where(inspired, self.inspired_break_even_rates[halite], self.break_even_rates[halite]) < mining_rate
+
+        rates = self.inspired_break_even_rates if inspired else self.break_even_rates
+
+        return rates[self._clip(halite)] < mining_rate
+
+    def _clip(self, halite):
+        return min(max(int(halite), 0), self.max_halite)
+
+@functools.lru_cache(maxsize=4)
+def get_mining_tables(max_halite, extract_ratio, move_cost_ratio, inspired_extract_ratio, inspired_bonus_multiplier, inspired_move_cost_ratio):
+    """
+    Build the mining tables for a set of game constants.
+
+    :param max_halite
+    :param extract_ratio
+    :param move_cost_ratio
+    :param inspired_extract_ratio
+    :param inspired_bonus_multiplier
+    :param inspired_move_cost_ratio
+    :return Returns a MiningTables.
+    """
+    halite = np.arange(max_halite + 1)
+
+    yields = -(-halite // extract_ratio)
+    inspired_extracted = -(-halite // inspired_extract_ratio)
+    inspired_yields = inspired_extracted + (inspired_extracted * inspired_bonus_multiplier).astype(np.int64)
+
+    move_costs = halite // move_cost_ratio
+    inspired_move_costs = halite // inspired_move_cost_ratio
+
+    # a turn of mining takes the cell to halite - yield, the cell is always lower, so
+    # rows only depend on lower rows
+    remaining = halite - yields
+    turns_to_threshold = np.zeros((max_halite + 1, max_halite + 1), dtype=np.int16)
+    for h in range(1, max_halite + 1):
+        turns_to_threshold[h, :h] = turns_to_threshold[remaining[h], :h] + 1
+
+    # net_mine = yield - cost to leave what's left, net_move = -cost to leave now + rate / extract_ratio
+    net_mine = yields - (halite - yields) // move_cost_ratio
+    break_even_rates = (net_mine + move_costs) * extract_ratio
+
+    # an inspired ship collects the bonus and moves at the inspired move cost
+    inspired_net_mine = inspired_yields - (halite - inspired_extracted) // inspired_move_cost_ratio
+    inspired_break_even_rates = (inspired_net_mine + inspired_move_costs) * extract_ratio
+
+    return MiningTables(max_halite, extract_ratio, yields, inspired_yields, move_costs, inspired_move_costs, turns_to_threshold, break_even_rates, inspired_break_even_rates)
@@ -11,6 +11,7 @@ from hlt.positionals import Position
 
 from myutils.utils import get_move, get_base_positions
 from myutils.task import Task
+from myutils.distance_maps import get_nearest_bases
 
 #
 # Example task
@@ -21,7 +22,7 @@ def random_path_action(game, ship):
         y = random.randint(0, game.game_map.height - 1)
         logging.debug("Task - Ship {} is moving to a new random point {}".format(ship.id, Position(x,y)))
         bases = get_base_positions(game)
-        ship.path, cost = game.game_map.navigate(ship.position, Position(x,y), "astar", {"move_cost_type": "turns", "excludes":bases})
+        ship.path, cost = game.game_map.navigate(ship.position, Position(x,y), "astar", {"move_cost_type": "turns", "excludes":bases, "ship_id": ship.id})
     else:
         logging.debug("Task - Ship {} is moving to random point {}".format(ship.id, ship.path[0]))
 
@@ -51,7 +52,7 @@ def make_dropoff_action(dropoff_position):
         logging.debug("Task - Ship {} is deploying dropoff to {}".format(ship.id, dropoff_position))
 
         if not ship.path and ship.position != dropoff_position:
-            ship.path, cost = game.game_map.navigate(ship.position, dropoff_position, "astar", {"move_cost_type": "turns", "excludes": get_base_positions(game)})
+            ship.path, cost = game.game_map.navigate(ship.position, dropoff_position, "astar", {"move_cost_type": "turns", "excludes": get_base_positions(game), "ship_id": ship.id})
 
         if ship.position == dropoff_position:
             if game.me.halite_amount >= 4000:
@@ -77,23 +78,9 @@ def make_dropoff_action(dropoff_position):
 def dropoff_complete(game, ship, dropoff_position):
     logging.debug("Task - Ship {} completed deploy_dropoff".format(ship.id))
 
-    ship_candidates = []
+    closest_base_distance = get_nearest_bases(game.game_map.width, game.game_map.height, game.me.get_base_positions()).get_distance(dropoff_position)
 
-    my_ships = game.me.get_ships()
-
-    base_positions = get_base_positions(game)
-
-    closest_base_position = False
-    for base_position in base_positions:
-        distance = game.game_map.calculate_distance(base_position, dropoff_position)
-        if closest_base_position is False or closest_base_distance > distance:
-            closest_base_position = base_position
-            closest_base_distance = distance
-
-    for s in my_ships:
-        distance = game.game_map.calculate_distance(s.position, dropoff_position)
-        if s.status == "transiting" or ship.status == "exploring":
-            ship_candidates.append((s, distance))
+    ship_candidates = [(s, distance) for s, distance in game.ship_index.get_ships_within(dropoff_position, closest_base_distance, owner = game.me.id) if s.status == "transiting" or ship.status == "exploring"]
 
     #
     # Disabled until there is a way to decide how many ships to send.  Sending too
@@ -146,7 +133,7 @@ def make_goto_action(p, modifier = 0):
     def action(game, ship):
 
         if not ship.path and ship.position != p:
-            path, cost = game.game_map.navigate(ship.position, p, "astar", {"move_cost_type": "turns"})
+            path, cost = game.game_map.navigate(ship.position, p, "astar", {"move_cost_type": "turns", "ship_id": ship.id})
 
             #if modifier:
             #    path = path[:-modifier]
@@ -0,0 +1,119 @@
+#
+# Peak areas
+#
+# Every cell above a threshold belongs to the peak it climbs to by steepest ascent, so an
+# area is everything that falls away from its peak. All areas come from one labeling pass,
+# parents are resolved by pointer jumping and the offset to the peak is carried along, so
+# areas that wrap across the map edges still get contiguous (unnormalized) coordinates.
+#
+
+import numpy as np
+
+from hlt.positionals import get_position_table
+
+from myutils.astar import get_neighbor_array
+
+# the (dx, dy) of a move to each column of the neighbour table, n, s, e, w
+NEIGHBOR_OFFSETS = np.array([[0, -1], [0, 1], [1, 0], [-1, 0]])
+
+class PeakAreas:
+    """
+    Peaks and their areas, sorted by total value, highest first
+    :param width
+    :param height
+    :param peaks List of peak Positions
+    :param totals numpy array, the total value of each area
+    :param counts numpy array, the number of cells in each area
+    :param labels HxW numpy array of indices into peaks, -1 for cells below the threshold
+    :param offsets HxWx2 numpy array, the (dx, dy) from each cell's peak to the cell
+    """
+    def __init__(self, width, height, peaks, totals, counts, labels, offsets):
+        self.width = width
+        self.height = height
+        self.peaks = peaks
+        self.totals = totals
+        self.counts = counts
+        self.labels = labels
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.peaks)
+
+    def get_area_mask(self, idx, area_map):
+        """
+        Get the area's values in its bounding box, e.g. for ndimage.measurements.center_of_mass.
+
+        :param idx Index of the area
+        :param area_map HxW numpy array the areas were labeled on
+        :return Returns a 3-tuple, the unnormalized row and col of the top left corner and
+            the area mask, cells outside of the area are 0.
+        """
+        peak = self.peaks[idx]
+        rows, cols = np.nonzero(self.labels == idx)
+        area_rows = peak.y + self.offsets[rows, cols, 1]
+        area_cols = peak.x + self.offsets[rows, cols, 0]
+
+        min_row = area_rows.min()
+        min_col = area_cols.min()
+
+        area_mask = np.zeros((area_rows.max() - min_row + 1, area_cols.max() - min_col + 1), dtype="float32")
+        area_mask[area_rows - min_row, area_cols - min_col] = area_map[rows, cols]
+
+        return int(min_row), int(min_col), area_mask
+
+def get_peak_areas(area_map, threshold):
+    """
+    Label the peak areas of a map.
+
+    A cell is in the area of the peak it reaches by always moving to its highest neighbour,
+    as long as that neighbour is higher. Cells at or below threshold aren't in any area.
+
+    :param area_map HxW numpy array, e.g. the cell value map
+    :param threshold
+    :return Returns a PeakAreas.
+    """
+    height, width = area_map.shape
+    cell_count = width * height
+    cell_ids = np.arange(cell_count)
+
+    values = np.asarray(area_map, dtype=np.float64).ravel()
+    in_area = values > threshold
+
+    # parent is the highest neighbour when it's higher, else the cell is a peak
+    neighbors = get_neighbor_array(width, height)
+    neighbor_values = values[neighbors]
+    best = np.argmax(neighbor_values, axis=1)
+    climbs = in_area & (neighbor_values[cell_ids, best] > values)
+
+    parent = np.where(climbs, neighbors[cell_ids, best], cell_ids)
+
+    # offset from parent to cell, summed while jumping it's the offset from peak to cell
+    offsets = np.where(climbs[:, None], -NEIGHBOR_OFFSETS[best], 0)
+
+    while True:
+        grandparent = parent[parent]
+        if np.array_equal(grandparent, parent):
+            break
+
+        offsets = offsets + offsets[parent]
+        parent = grandparent
+
+    peak_ids = np.nonzero(in_area & (parent == cell_ids))[0]
+
+    # label by peak, order by total value and then by peak value, highest first
+    peak_index = np.full(cell_count, -1, dtype=np.int64)
+    peak_index[peak_ids] = np.arange(len(peak_ids))
+    labels = np.where(in_area, peak_index[parent], -1)
+
+    totals = np.bincount(labels[in_area], weights=values[in_area], minlength=len(peak_ids))
+    counts = np.bincount(labels[in_area], minlength=len(peak_ids))
+
+    order = np.lexsort((-values[peak_ids], -totals))
+    rank = np.empty(len(peak_ids), dtype=np.int64)
+    rank[order] = np.arange(len(peak_ids))
+    labels = np.where(in_area, rank[np.maximum(labels, 0)], -1)
+
+    positions = get_position_table(width, height)
+    peaks = [positions[cell_id] for cell_id in peak_ids[order].tolist()]
+
+    return PeakAreas(width, height, peaks, totals[order], counts[order], labels.reshape(height, width), offsets.reshape(height, width, 2))
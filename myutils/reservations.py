@@ -0,0 +1,179 @@
+#
+# Space-time reservations
+#
+# Ships write their planned (cell, turn) pairs into the table when they plan a path, ships
+# planning later route around them. Plans are conflict free from the start instead of
+# being untangled by collision resolution after the fact.
+#
+
+import numpy as np
+
+class ReservationTable:
+    """
+    Reserved cells for the next horizon turns. Slot turn % horizon holds the reservations
+    for a turn.
+    :param width
+    :param height
+    :param horizon Number of turns reservations are kept for
+    """
+    def __init__(self, width, height, horizon):
+        self.width = width
+        self.height = height
+        self.horizon = horizon
+        self.turn = 0
+
+        # ship id holding each (turn slot, cell id), -1 == free
+        self._table = np.full((horizon, width * height), -1, dtype=np.int32)
+
+        # keyed on ship id, list of (turn, cell id)
+        self._reservations = {}
+
+    def advance(self, turn):
+        """
+        Move the table to turn. Reservations for earlier turns are dropped.
+
+        :param turn
+        :return None
+        """
+        for t in range(max(self.turn, turn - self.horizon), turn):
+            self._table[t % self.horizon].fill(-1)
+
+        self.turn = turn
+
+        for ship_id in list(self._reservations.keys()):
+            self._reservations[ship_id] = [r for r in self._reservations[ship_id] if r[0] >= turn]
+            if not self._reservations[ship_id]:
+                del self._reservations[ship_id]
+
+    def get(self, cell_id, turn):
+        """
+        :return Returns the id of the ship holding cell_id at turn, -1 if free. Turns
+            outside of the horizon are always free.
+        """
+        if turn < self.turn or turn >= self.turn + self.horizon:
+            return -1
+
+        return self._table[turn % self.horizon, cell_id]
+
+    def get_reserved_cell(self, ship_id, turn):
+        """
+        :return Returns the cell id ship_id holds at turn, None if there is no reservation.
+        """
+        for t, cell_id in self._reservations.get(ship_id, []):
+            if t == turn:
+                return cell_id
+
+        return None
+
+    def reserve(self, ship_id, cell_ids, start_turn):
+        """
+        Reserve consecutive cells for a ship. Any earlier reservations for the ship are released.
+
+        :param ship_id
+        :param cell_ids List of cell ids, cell_ids[0] is reserved for start_turn
+        :param start_turn
+        :return None
+        """
+        self.release(ship_id)
+
+        reservations = []
+        for turn, cell_id in enumerate(cell_ids, start_turn):
+            if turn >= self.turn + self.horizon:
+                break
+
+            if turn < self.turn or self._table[turn % self.horizon, cell_id] != -1:
+                continue
+
+            self._table[turn % self.horizon, cell_id] = ship_id
+            reservations.append((turn, cell_id))
+
+        if reservations:
+            self._reservations[ship_id] = reservations
+
+    def release(self, ship_id):
+        """
+        Release all reservations held by a ship.
+
+        :param ship_id
+        :return None
+        """
+        for turn, cell_id in self._reservations.pop(ship_id, []):
+            slot = self._table[turn % self.horizon]
+            if slot[cell_id] == ship_id:
+                slot[cell_id] = -1
+
+    def validate(self, ship_positions):
+        """
+        Release the reservations of ships that are gone or not where they planned to be.
+
+        :param ship_positions Dict of cell ids, keyed on ship id
+        :return Returns the list of ship ids whose reservations were released.
+        """
+        released = []
+
+        for ship_id in list(self._reservations.keys()):
+            expected_cell = self.get_reserved_cell(ship_id, self.turn)
+            actual_cell = ship_positions.get(ship_id)
+
+            if actual_cell is None or (expected_cell is not None and expected_cell != actual_cell):
+                self.release(ship_id)
+                released.append(ship_id)
+
+        return released
+
+    def is_blocked(self, ship_id, from_cell, to_cell, turn):
+        """
+        Can ship_id move from from_cell at turn to to_cell at turn + 1?
+
+        :return Returns True if another ship holds to_cell at turn + 1, or the move swaps
+            cells with another ship.
+        """
+        holder = self.get(to_cell, turn + 1)
+        if holder != -1 and holder != ship_id:
+            return True
+
+        holder = self.get(to_cell, turn)
+        if holder != -1 and holder != ship_id and self.get(from_cell, turn + 1) == holder:
+            return True
+
+        return False
+
+def order_by_reservations(ships, reservations, width):
+    """
+    Order ships so that a ship moving into a cell another ship is leaving gets its move after
+    that ship. Otherwise the cell is still occupied when the follower moves and the move is
+    a collision.
+
+    :param ships List of ships, in priority order
+    :param reservations ReservationTable
+    :param width Map width
+    :return Returns a new list of ships. Apart from followers, priority order is kept.
+    """
+    next_turn = reservations.turn + 1
+
+    ship_by_cell = {ship.position.y * width + ship.position.x: ship for ship in ships}
+
+    # the ship each ship follows, None if it isn't moving into another ship's cell
+    leaders = {}
+    for ship in ships:
+        cell_id = reservations.get_reserved_cell(ship.id, next_turn)
+        leader = ship_by_cell.get(cell_id) if cell_id is not None else None
+        leaders[ship.id] = leader if leader is not None and leader.id != ship.id else None
+
+    ordered = []
+    visited = set()
+
+    for ship in ships:
+        # walk up to the front of the line, a cycle is a swap, keep priority order for it
+        line = []
+        while ship is not None and not (ship.id in visited):
+            visited.add(ship.id)
+            line.append(ship)
+            ship = leaders[ship.id]
+
+        if ship is not None and ship in line:
+            ordered.extend(line)
+        else:
+            ordered.extend(reversed(line))
+
+    return ordered
@@ -0,0 +1,119 @@
+#
+# Ship spatial index
+#
+# Ships of all players hashed into a toroidal grid of square buckets. Ship rows are sorted by
+# bucket, so each bucket is a contiguous slice. A radius query only looks at the ships in
+# the buckets that overlap the query's bounding box, wrapping around the map edges.
+#
+
+import math
+import numpy as np
+
+class ShipIndex:
+    """
+    Grid hash of a set of ships
+    :param table ShipTable of the ships, see hlt.ship_registry
+    :param width Map width
+    :param height Map height
+    :param bucket_size Bucket width and height (cells)
+    """
+    def __init__(self, table, width, height, bucket_size):
+        self.table = table
+        self.width = width
+        self.height = height
+        self.bucket_size = bucket_size
+
+        self._bucket_cols = math.ceil(width / bucket_size)
+        self._bucket_rows = math.ceil(height / bucket_size)
+
+        buckets = (table.y // bucket_size) * self._bucket_cols + table.x // bucket_size
+
+        # rows of table sorted by bucket, bucket b is _order[_starts[b]:_starts[b + 1]]
+        self._order = np.argsort(buckets, kind="stable")
+        self._starts = np.searchsorted(buckets[self._order], np.arange(self._bucket_rows * self._bucket_cols + 1))
+
+    def __len__(self):
+        return len(self.table)
+
+    def get_ships_within(self, position, radius, owner = None, exclude_owner = None):
+        """
+        Get the ships within a Manhattan distance of position.
+
+        :param position
+        :param radius Max distance, inclusive
+        :param owner Player id, only this player's ships. None for all players
+        :param exclude_owner Player id, leave out this player's ships
+        :return Returns a list of (ship, distance) tuples, closest first. Ties are in table order.
+        """
+        rows = self._get_candidate_rows(position, radius)
+
+        distances = self._get_distances(position, rows)
+
+        keep = distances <= radius
+        if owner is not None:
+            keep &= self.table.owner[rows] == owner
+        if exclude_owner is not None:
+            keep &= self.table.owner[rows] != exclude_owner
+
+        return self._to_results(rows[keep], distances[keep])
+
+    def get_nearest(self, position, k = 1, owner = None, exclude_owner = None):
+        """
+        Get the k ships closest to position. The search radius doubles until k ships are
+        found or the whole map is covered.
+
+        :param position
+        :param k
+        :param owner Player id, only this player's ships. None for all players
+        :param exclude_owner Player id, leave out this player's ships
+        :return Returns a list of at most k (ship, distance) tuples, closest first. Ties are in
+            table order.
+        """
+        max_radius = self.width // 2 + self.height // 2
+        radius = self.bucket_size
+
+        while True:
+            ships = self.get_ships_within(position, radius, owner, exclude_owner)
+            if len(ships) >= k or radius >= max_radius:
+                return ships[:k]
+
+            radius = min(2 * radius, max_radius)
+
+    def _get_candidate_rows(self, position, radius):
+        """
+        :return Returns the table rows in the buckets overlapping the square of radius around
+            position, in table order.
+        """
+        if 2 * radius + 1 >= self.width and 2 * radius + 1 >= self.height:
+            return np.arange(len(self.table))
+
+        cols = self._get_bucket_range(position.x, radius, self.width, self._bucket_cols)
+        bucket_rows = self._get_bucket_range(position.y, radius, self.height, self._bucket_rows)
+
+        buckets = (bucket_rows.reshape(-1, 1) * self._bucket_cols + cols.reshape(1, -1)).ravel()
+
+        slices = [self._order[self._starts[b]:self._starts[b + 1]] for b in buckets.tolist()]
+
+        return np.sort(np.concatenate(slices)) if slices else np.empty(0, dtype=np.int64)
+
+    def _get_bucket_range(self, center, radius, size, bucket_count):
+        """
+        :return Returns the distinct buckets, along one axis, of the cells center - radius to
+            center + radius, wrapped.
+        """
+        if 2 * radius + 1 >= size:
+            return np.arange(bucket_count)
+
+        cells = np.arange(center - radius, center + radius + 1) % size
+
+        return np.unique(cells // self.bucket_size)
+
+    def _get_distances(self, position, rows):
+        dx = np.abs(self.table.x[rows] - position.x % self.width)
+        dy = np.abs(self.table.y[rows] - position.y % self.height)
+
+        return np.minimum(dx, self.width - dx) + np.minimum(dy, self.height - dy)
+
+    def _to_results(self, rows, distances):
+        order = np.argsort(distances, kind="stable")
+        return [(self.table.ships[row], distance) for row, distance in zip(rows[order].tolist(), distances[order].tolist())]
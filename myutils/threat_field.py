@@ -0,0 +1,86 @@
+#
+# Enemy threat field
+#
+# For every cell, the least cargo among the enemy ships on its 4 neighbours. A ship moving
+# onto a cell can be rammed by any of those ships, and an enemy with little cargo loses
+# little by ramming. Built once per turn from the frame, after that a safe move check for
+# any cargo threshold is a lookup.
+#
+
+import numpy as np
+
+# min_cargo of a cell with no enemy neighbours, above any cargo threshold
+NO_THREAT = np.iinfo(np.int32).max
+
+# (dx, dy) of the 4 neighbours
+NEIGHBOUR_OFFSETS = ((0, -1), (0, 1), (1, 0), (-1, 0))
+
+class ThreatField:
+    """
+    Enemy ships next to each cell, from one player's point of view. Arrays are HxW, indexed [y, x]
+    :param player_id The player the ships are enemies of
+    :param min_cargo numpy array, least cargo of the enemy ships on the cell's neighbours,
+        NO_THREAT if there are none
+    :param enemy_id_map numpy array, id of the enemy ship on each cell, -1 == none
+    :param cargo_map numpy array, cargo of the enemy ship on each cell
+    """
+    def __init__(self, player_id, min_cargo, enemy_id_map, cargo_map):
+        self.player_id = player_id
+        self.min_cargo = min_cargo
+        self.enemy_id_map = enemy_id_map
+        self.cargo_map = cargo_map
+
+    def is_safe(self, x, y, halite_threshold):
+        """
+        Is a move onto x, y safe from enemy ships with less than halite_threshold cargo?
+
+        :param x Normalized x
+        :param y Normalized y
+        :param halite_threshold Enemy ships with less cargo are a threat
+        :return Returns True if no neighbour of x, y has a threatening enemy ship.
+        """
+        return self.min_cargo[y, x] >= halite_threshold
+
+    def get_threat_ids(self, x, y, halite_threshold):
+        """
+        :return Returns the ids of the enemy ships next to x, y with less than
+            halite_threshold cargo.
+        """
+        height, width = self.enemy_id_map.shape
+
+        ids = []
+        for dx, dy in NEIGHBOUR_OFFSETS:
+            nx = (x + dx) % width
+            ny = (y + dy) % height
+            ship_id = self.enemy_id_map[ny, nx]
+            if ship_id != -1 and self.cargo_map[ny, nx] < halite_threshold:
+                ids.append(int(ship_id))
+
+        return ids
+
+def make_threat_field(ships, player_id, width, height):
+    """
+    Build the threat field of a player.
+
+    :param ships Nx5 numpy array of (owner, ship id, x, y, halite), the ships of all players
+    :param player_id
+    :param width
+    :param height
+    :return Returns a ThreatField.
+    """
+    enemies = ships[ships[:, 0] != player_id]
+
+    enemy_id_map = np.full((height, width), -1, dtype=np.int32)
+    enemy_id_map[enemies[:, 3], enemies[:, 2]] = enemies[:, 1]
+
+    cargo_map = np.full((height, width), NO_THREAT, dtype=np.int32)
+    cargo_map[enemies[:, 3], enemies[:, 2]] = enemies[:, 4]
+
+    min_cargo = np.full((height, width), NO_THREAT, dtype=np.int32)
+
+    # the neighbour at (x + dx, y + dy) rolled back onto (x, y)
+    for dx, dy in NEIGHBOUR_OFFSETS:
+        shift = (-dy, -dx)
+        np.minimum(min_cargo, np.roll(cargo_map, shift, axis=(0, 1)), out=min_cargo)
+
+    return ThreatField(player_id, min_cargo, enemy_id_map, cargo_map)
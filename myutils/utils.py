@@ -21,6 +21,7 @@ from operator import attrgetter, itemgetter
 from myutils.constants import *
 
 from myutils.cell_block import CellBlock
+from myutils.distance_maps import get_nearest_bases
 
 def spawn_ok(game):
     """
@@ -230,11 +231,14 @@ def get_best_blocks(game, ship, w, h):
     :returns Returns a list of cell blocks, sorted by halite
     """
     best_blocks = []
+    base_position = get_base_positions(game, ship.position)
+
+    # blocks are views, max and mean are lookups into the map's block stats
     for blocks in game.game_map.get_cell_blocks(ship.position, w, h): # returns list of tuples [(direction), CellBlock]
         directional_offset = blocks[0]
         block = blocks[1]
 
-        has_base = True if block.contains_position(get_base_positions(game, ship.position)) else False
+        has_base = True if block.contains_position(base_position) else False
 
         if block.get_max() < ship.mining_threshold:
             continue
@@ -244,10 +248,7 @@ def get_best_blocks(game, ship, w, h):
 
         next_position = ship.position.directional_offset(directional_offset)
 
-        if len(game.players) == 2:
-            ces_args = {"halite_amount": max(COLLISION_AVOIDANCE_THRESHOLD_MIN, ship.halite_amount * COLLISION_AVOIDANCE_EXCHANGE_RATIO)}
-        else:
-            ces_args = {"halite_amount": 1001} # 1001 == all ships a threat, 0 == no ships a threat
+        ces_args = {"halite_amount": get_collision_avoidance_threshold(game, ship)}
 
         safe_positions, danger_positions = check_enemy_ships(game.game_map, ship.position, next_position, game.me.id, ces_args)
         if not safe_positions:
@@ -368,10 +369,7 @@ def get_random_move(game, ship, args = None):
 
     cell = game.game_map[new_position]
 
-    if len(game.players) == 2:
-        ces_args = {"halite_amount": max(COLLISION_AVOIDANCE_THRESHOLD_MIN, ship.halite_amount * COLLISION_AVOIDANCE_EXCHANGE_RATIO)}
-    else:
-        ces_args = {"halite_amount": 1001} # 1001 == all ships a threat, 0 == no ships a threat
+    ces_args = {"halite_amount": get_collision_avoidance_threshold(game, ship)}
 
     safe_positions, danger_positions = check_enemy_ships(game.game_map, ship.position, new_position, game.me.id, ces_args)
     if not safe_positions:
@@ -444,8 +442,8 @@ def get_nav_move(game, ship, args = None):
 
         if DEBUG & (DEBUG_NAV): logging.info("Nav  - Ship {} Getting nav path. Found waypoint {}, calulating waypoint path".format(ship.id, next_position))
 
-        # calc a continous path
-        path, cost = game_map.navigate(ship.position, normalized_next_position, waypoint_algorithm, args)
+        # calc a continous path, routed around and reserved against the paths of other ships
+        path, cost = game_map.navigate(ship.position, normalized_next_position, waypoint_algorithm, dict(args, ship_id=ship.id))
 
         if not path:
             logging.warn("Nav  - Ship {} Nav failed, can't reach waypoint {} from {}".format(ship.id, normalized_next_position, ship.position))
@@ -461,6 +459,11 @@ def get_nav_move(game, ship, args = None):
             ship.path.pop()
             ship.path = ship.path + path
 
+    # ships following a path planned on an earlier turn reserve it again, so that ships planning
+    # after them route around it
+    if game_map.reservations.get_reserved_cell(ship.id, game.turn_number + 1) is None:
+        game_map.reserve_path(ship.id, ship.position, ship.path)
+
     # get the potential next cell
     cell = game_map[ship.path[-1]]
 
@@ -469,10 +472,7 @@ def get_nav_move(game, ship, args = None):
     move = Direction.convert(offset)
 
     # check move againt collission avoidance policy
-    if len(game.players) == 2:
-        ces_args = {"halite_amount": max(COLLISION_AVOIDANCE_THRESHOLD_MIN, ship.halite_amount * COLLISION_AVOIDANCE_EXCHANGE_RATIO)}
-    else:
-        ces_args = {"halite_amount": 1001} # 1001 == all ships a threat, 0 == no ships a threat
+    ces_args = {"halite_amount": get_collision_avoidance_threshold(game, ship)}
 
     safe_positions, danger_positions = check_enemy_ships(game_map, ship.position, cell.position, ship.owner, ces_args)
     if not safe_positions:
@@ -598,12 +598,8 @@ def move_ok(game, ship, args = None):
     # if ship in a base (dropoff/shipyard), set fuel to max to the ship departs
     # refuel_amount = constants.MAX_HALITE if ship.position in base else cell_halite * SHIP_MINING_EFFICIENCY
 
-    net_mine = (cell_halite * SHIP_MINING_EFFICIENCY) + (cell_halite - cell_halite * SHIP_MINING_EFFICIENCY) * -SHIP_FUEL_COST
-    net_move = cell_halite * -SHIP_FUEL_COST + game.get_mining_rate() * SHIP_MINING_EFFICIENCY
-
     #logging.debug("fuel_status: {}".format(fuel_status))
     #logging.debug("refuel_amount: {}".format(refuel_amount))
-    #logging.debug("net_mine: {}, net_move: {}".format(net_mine, net_move))
 
     if ship.status == "transiting":
         #if refuel_amount > net_mining_yield and fuel_status < SHIP_REFUEL_THRESHOLD:
@@ -614,7 +610,9 @@ def move_ok(game, ship, args = None):
         #    return True
         pass
     elif ship.status == "returning":
-        if net_move > net_mine or fuel_status > SHIP_REFUEL_THRESHOLD:
+        # net_move > net_mine, moving on pays more than mining the cell
+        inspired = game.game_map.get_inspiration_field(ship.owner).is_inspired(ship.position)
+        if game.mining_tables.should_move(cell_halite, game.get_mining_rate(), inspired) or fuel_status > SHIP_REFUEL_THRESHOLD:
             return True
     elif ship.status == "tasked":
         return True # don't prevent a tasked ship from moving
@@ -704,28 +702,19 @@ def get_base_positions(game, position = None):
 
     If position is None, get all bases.
 
+    The closest base of every cell is cached per set of bases, see get_nearest_bases(), so
+    a lookup is an array read.
+
     :param game
     :param position
     :return Returns a single position if the position arg is provded, returns an list of all base positions otherwise.
     """
-    base_positions = [game.me.shipyard.position]
-
-    for do in game.me.get_dropoffs():
-        base_positions.append(do.position)
+    base_positions = game.me.get_base_positions()
 
     if position is None:
-        return base_positions
-
-    min_distance = False
-    closest_base = False
+        return list(base_positions)
 
-    for base_position in base_positions:
-        distance = game.game_map.calculate_distance(position, base_position)
-        if closest_base is False or distance < min_distance:
-            min_distance = distance
-            closest_base = base_position
-
-    return closest_base
+    return get_nearest_bases(game.game_map.width, game.game_map.height, base_positions).get_base(position)
 
 #
 # Collision Resolution
@@ -752,12 +741,14 @@ def get_base_positions(game, position = None):
 #       ship to move. In this case moves are unwound intil a ship can remain in it's position.
 #
 
-def resolve_collsions(game, ship_states):
+def resolve_collsions(game, ship_states, deadline = None):
     """
     Resolve all collisions in the collision list
 
     :param game
     :param ship_states Pass in the states so we can update the blocked_by attrib
+    :param deadline TurnDeadline, when time runs out colliding ships stay still instead of
+        calling their resolver. None for no limit
     :return None
     """
     game_map = game.game_map
@@ -791,6 +782,9 @@ def resolve_collsions(game, ship_states):
                 if DEBUG & (DEBUG_NAV): logging.info("Nav  - Ship {} - calling provided resolver: moving {} to {} collided with ship {}, resolving ...".format(ship1.id, direction, collision_cell.position, ship2.id))
                 if collision_type == "proximity":
                     move = None
+                elif deadline is not None and deadline.degrade("collisions"):
+                    if DEBUG & (DEBUG_NAV): logging.info("Nav  - Ship {} - out of time, staying still".format(ship1.id))
+                    move = None
                 else:
                     move = resolver(game, collision, resolver_args)
 
@@ -843,20 +837,14 @@ def get_backoff_point(game, ship, destination):
     # when there's a collion, we backoff between 1 and nShips/2 cells
     mult = random.randint(1, max(1, round(len(game.me.get_ships()) / 2)))
 
-    backoffPoint = ship.position + Position(backoffDirection[0] * mult, backoffDirection[1] * mult)
+    backoff_x = ship.position.x + backoffDirection[0] * mult
+    backoff_y = ship.position.y + backoffDirection[1] * mult
 
     # if the backup point wrap, truncate it to the edge to prevent simple nav from failing
-    if backoffPoint.x > game.game_map.width - 1:
-        backoffPoint.x = game.game_map.width - 1
+    backoff_x = min(max(backoff_x, 0), game.game_map.width - 1)
+    backoff_y = min(max(backoff_y, 0), game.game_map.height - 1)
 
-    if backoffPoint.x < 0:
-        backoffPoint.x = 0
-
-    if backoffPoint.y > game.game_map.height - 1:
-        backoffPoint.y = game.game_map.height - 1
-
-    if backoffPoint.y <    0:
-        backoffPoint.y = 0
+    backoffPoint = game.game_map.get_position(backoff_x, backoff_y)
 
     if DEBUG & (DEBUG_NAV): logging.info("Nav  - Ship {} has backoffPoint {}".format(ship.id, backoffPoint))
 
@@ -945,10 +933,7 @@ def resolve_random_move(game, collision, args = {}):
         cell = game.game_map[new_position]
 
         # check move againt collission avoidance policy
-        if len(game.players) == 2:
-            ces_args = {"halite_amount": max(COLLISION_AVOIDANCE_THRESHOLD_MIN, ship.halite_amount * COLLISION_AVOIDANCE_EXCHANGE_RATIO)}
-        else:
-            ces_args = {"halite_amount": 1001} # 1001 == all ships a threat, 0 == no ships a threat
+        ces_args = {"halite_amount": get_collision_avoidance_threshold(game, ship)}
 
         if new_position != ship.position:
             safe_positions, danger_positions = check_enemy_ships(game.game_map, ship.position, new_position, game.me.id, ces_args)
@@ -1002,10 +987,7 @@ def resolve_halite_move(game, collision, args = {}):
             score = cell.halite_amount
 
             # check move againt collission avoidance policy
-            if len(game.players) == 2:
-                ces_args = {"halite_amount": max(COLLISION_AVOIDANCE_THRESHOLD_MIN, ship.halite_amount * COLLISION_AVOIDANCE_EXCHANGE_RATIO)}
-            else:
-                ces_args = {"halite_amount": 1001} # 1001 == all ships a threat, 0 == no ships a threat
+            ces_args = {"halite_amount": get_collision_avoidance_threshold(game, ship)}
 
             safe_positions, danger_positions = check_enemy_ships(game.game_map, ship.position, cell.position, ship.owner, ces_args)
             if not safe_positions:
@@ -1232,22 +1214,10 @@ def respond_to_sos(game, sos_call):
         if DEBUG & (DEBUG_GAME): logging.info("Game - Sos disregarded from ship {} @ {}. Halite lost is {}, threshold is {}".format(sos_ship_id, sos_position, sos_halite_lost, 500))
         return False
 
-    block_size = 12
-    block = CellBlock(game.game_map, Position(round(sos_position.x - block_size/2), round(sos_position.y - block_size/2)), block_size, block_size)
+    radius = SOS_RESPONSE_RADIUS
 
-    cells = block.get_cells()
-
-    enemies = []
-    friendlies = []
-
-    for cell in cells:
-        if cell.is_occupied:
-            distance = game.game_map.calculate_distance(cell.position, sos_position)
-            if cell.ship.owner == game.me.id:
-                if cell.ship.status != "returning" and cell.ship.status != "homing":
-                    friendlies.append((cell.ship, distance))
-            else:
-                enemies.append((cell.ship, distance))
+    friendlies = [(ship, distance) for ship, distance in game.ship_index.get_ships_within(sos_position, radius, owner = game.me.id) if ship.status != "returning" and ship.status != "homing"]
+    enemies = game.ship_index.get_ships_within(sos_position, radius, exclude_owner = game.me.id)
 
     friendlies.sort(key=lambda item: (item[1], item[0].halite_amount))
     enemies.sort(key=lambda item: (item[1]), reverse=True)
@@ -1276,14 +1246,14 @@ def respond_to_sos(game, sos_call):
 
     if DEBUG & (DEBUG_GAME):
         if friendlies:
-           logging.info("Game - There are {} friendlies within {} moves of {}. The closest is ship {} @ {} away.".format(len(friendlies), block_size, sos_position, friendly_ship.id, friendly_distance))
+           logging.info("Game - There are {} friendlies within {} moves of {}. The closest is ship {} @ {} away.".format(len(friendlies), radius, sos_position, friendly_ship.id, friendly_distance))
         else:
-            logging.info("Game - There are no friendlies within {} moves of {} with {} cargo capacity".format(block_size, sos_position, 600))
+            logging.info("Game - There are no friendlies within {} moves of {} with {} cargo capacity".format(radius, sos_position, 600))
 
         if enemies:
-           logging.info("Game - There are {} enemies within {} moves of {}. The closest is ship {} @ {} away.".format(len(enemies), block_size, sos_position, best_enemy_ship.id, best_enemy_distance))
+           logging.info("Game - There are {} enemies within {} moves of {}. The closest is ship {} @ {} away.".format(len(enemies), radius, sos_position, best_enemy_ship.id, best_enemy_distance))
         else:
-            logging.info("Game - There are no enemies within {} moves of {}".format(block_size, sos_position))
+            logging.info("Game - There are no enemies within {} moves of {}".format(radius, sos_position))
 
         if responder and responder.assignments:
             if DEBUG & (DEBUG_GAME): logging.info("Game - Ship {} diverted from assignment {} to respond to sos from ship {} @ {}. t{}".format(responder.id, responder.assignments[-1], sos_ship_id, sos_position, game.turn_number))
@@ -1302,7 +1272,7 @@ def get_position_from_move(game, ship, move):
 
     """
     move_offset = DIRECTIONS[move]
-    return game.game_map.normalize(ship.position + Position(move_offset[0], move_offset[1]))
+    return game.game_map.get_position(ship.position.x + move_offset[0], ship.position.y + move_offset[1])
 
 
 def handle_base_clear_request(game, responder_ship, base_position, blocker_ship):
@@ -1337,27 +1307,42 @@ def handle_base_clear_request(game, responder_ship, base_position, blocker_ship)
     return True
 
 
+def get_collision_avoidance_threshold(game, ship):
+    """
+    Get the enemy cargo below which an enemy ship next to a move is a threat to ship. In 2
+    player games trading a ship for more enemy cargo is ok, otherwise all ships are a threat.
+
+    :param game
+    :param ship
+    :return Returns the halite threshold, 1001 == all ships a threat, 0 == no ships a threat
+    """
+    if len(game.players) == 2:
+        return max(COLLISION_AVOIDANCE_THRESHOLD_MIN, ship.halite_amount * COLLISION_AVOIDANCE_EXCHANGE_RATIO)
+
+    return 1001
+
 def check_enemy_ships(game_map, start, destination, player_id, args = {}):
     """
     Checks first move toward destination for ememy ships within 1 cell. If destination is multiple cells
     away, more than one friendly position may be returned.
 
+    Enemy ships are read from the map's per turn threat field, see GameMap.get_threat_field(),
+    the check for a move is a lookup. Ships are only collected for moves that are unsafe.
+
     :param start
     :param destination
     :param args:
-        -player_id
+        -halite_amount Enemy ships with less cargo are a threat, default 1001 (all ships)
     :return Returns 2-tuple
-        A list of first move positions between start and destination, a list of
-        tuples of enemy ships blocking the moves.
+        A list of first move positions between start and destination, a dict, keyed on
+        first move position, of the enemy ships blocking the move.
 
     ToDo - options:
         - 'risk', risk threshold based on number of enemy ships
     """
-    path = []
     danger_positions = {}
     safe_positions = []
 
-    risk = args["risk"] if "risk" in args else 0
     halite_amount = args["halite_amount"] if "halite_amount" in args else 1001
 
     if start == destination:
@@ -1365,29 +1350,20 @@ def check_enemy_ships(game_map, start, destination, player_id, args = {}):
     else:
         possible_offsets = game_map.get_unsafe_moves(start, destination)
 
-    for offset in possible_offsets:
-        p1 = start.directional_offset(offset)
-        for p2 in game_map[p1].position.get_surrounding_cardinals():
-            if p2 == start:
-                continue
-
-            border_cell = game_map[p2]
-
-            if border_cell.is_occupied and border_cell.ship.owner != player_id:
+    first_moves = [game_map.normalize(start.directional_offset(offset)) for offset in possible_offsets]
 
-                if border_cell.ship.halite_amount >= halite_amount:
-                    continue
+    # this isn't optimal for an number of reasons ... ship can be None during collision
+    #res, this allows collision to occur. Hard coded status
+    start_ship = game_map[start].ship
+    if start_ship and start_ship.status == "homing":
+        return first_moves, danger_positions
 
-                # this isn't optimal for an number of reasons ... ship can be None during collision
-                #res, this allows collision to occur. Hard coded status
-                if game_map[start].ship and game_map[start].ship.status == "homing":
-                    continue
+    threats = game_map.get_threat_field(player_id)
 
-                if not (p1) in danger_positions:
-                    danger_positions[p1] = []
-                danger_positions[p1].append(border_cell.ship)
-
-        if not (p1 in danger_positions):
+    for p1 in first_moves:
+        if threats.is_safe(p1.x, p1.y, halite_amount):
             safe_positions.append(p1)
+        else:
+            danger_positions[p1] = [game_map.get_ship(ship_id) for ship_id in threats.get_threat_ids(p1.x, p1.y, halite_amount)]
 
     return safe_positions, danger_positions
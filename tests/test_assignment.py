@@ -0,0 +1,28 @@
+import numpy as np
+
+from hlt.positionals import Position
+from myutils.distance_maps import get_distance_map
+from myutils.assignment import get_target_values, assign_targets
+
+WIDTH = 32
+HEIGHT = 32
+
+def test_ships_at_different_positions_get_their_closest_targets():
+    ship_positions = [Position(2, 2), Position(20, 20)]
+    target_positions = [Position(21, 20), Position(3, 2)]
+
+    distance_maps = [get_distance_map(WIDTH, HEIGHT, p) for p in ship_positions]
+    values = get_target_values(distance_maps, target_positions, [500, 500], 10)
+
+    # equal yields, rows only differ by each ship's own travel
+    assert not np.array_equal(values[0], values[1])
+    assert assign_targets(values) == {0: 1, 1: 0}
+
+def test_wrapped_travel():
+    ship_positions = [Position(0, 0)]
+    target_positions = [Position(WIDTH - 1, 0), Position(5, 0)]
+
+    distance_maps = [get_distance_map(WIDTH, HEIGHT, p) for p in ship_positions]
+    values = get_target_values(distance_maps, target_positions, [500, 500], 10)
+
+    assert values[0].tolist() == [490, 450]
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from hlt import constants
+from hlt.game_map import GameMap
+from hlt.positionals import Position
+
+@pytest.mark.parametrize("size, seed", [(8, 0), (12, 1), (16, 2), (16, 3)])
+def test_cell_value_map_matches_per_cell_values(size, seed):
+    rng = np.random.RandomState(seed)
+    constants.set_dimensions(size, size)
+
+    game_map = GameMap(rng.randint(0, 1000, (size, size)), size, size)
+    base = Position(rng.randint(size), rng.randint(size))
+    distance_constant = rng.uniform(.5, 20.)
+
+    # the per cell reference, otypes keeps np.vectorize() from inferring an int map
+    expected = np.vectorize(game_map.get_cell_value, otypes=[np.float64])(base, game_map.get_coord_map(), distance_constant)
+
+    actual = game_map.get_cell_value_map(base, distance_constant)
+
+    assert np.array_equal(actual, expected)
@@ -0,0 +1,45 @@
+import numpy as np
+
+from hlt import constants
+from hlt.entity import Ship
+from hlt.game_map import GameMap
+from hlt.positionals import Position
+from myutils.threat_field import make_threat_field
+
+WIDTH = 8
+HEIGHT = 8
+
+# (owner, ship id, x, y, halite)
+SHIPS = np.array([
+    [0, 1, 3, 3, 500],
+    [1, 2, 4, 3, 10],
+    [1, 3, 7, 0, 900],
+])
+
+def test_threats_are_enemy_neighbours_with_less_cargo():
+    threats = make_threat_field(SHIPS, 0, WIDTH, HEIGHT)
+
+    # ship 2 is east of (3, 3), our own ship 1 is never a threat
+    assert not threats.is_safe(3, 3, 100)
+    assert threats.get_threat_ids(3, 3, 100) == [2]
+    assert threats.is_safe(3, 3, 10)
+    assert not threats.is_safe(4, 2, 1001)
+    assert threats.is_safe(2, 3, 1001)
+
+    # ship 3 wraps onto (0, 0) and (7, 7)
+    assert threats.get_threat_ids(0, 0, 1001) == [3]
+    assert threats.get_threat_ids(7, 7, 1001) == [3]
+
+def test_threat_ids_resolve_to_ships_on_the_map():
+    constants.set_dimensions(WIDTH, HEIGHT)
+
+    game_map = GameMap(np.zeros((HEIGHT, WIDTH)), WIDTH, HEIGHT)
+    game_map._update(np.empty((0, 3)), SHIPS)
+
+    ship = Ship(1, 2, Position(4, 3), 10)
+    game_map[ship.position].mark_unsafe(ship)
+
+    threats = game_map.get_threat_field(0)
+
+    assert [game_map.get_ship(ship_id) for ship_id in threats.get_threat_ids(3, 3, 100)] == [ship]
+    assert game_map.get_ship(3) is None